@@ -1,11 +1,29 @@
 import os
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-from time import sleep
+from bs4 import BeautifulSoup, Tag, NavigableString, CData
+from urllib.parse import urljoin, urlparse, parse_qs, urlsplit, urlunsplit
+from time import sleep, monotonic, perf_counter
 import re
 import hashlib
-from collections import defaultdict
+import asyncio
+import threading
+import json
+import sqlite3
+import tempfile
+import queue
+import socket
+import time
+import multiprocessing
+import bisect
+import math
+import struct
+import gzip
+from requests.adapters import HTTPAdapter
+from collections import defaultdict, namedtuple, deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 # 저장할 폴더
 save_dir = "fomos_images"
@@ -15,6 +33,44 @@ os.makedirs(save_dir, exist_ok=True)
 log_dir = "fomos_logs"
 os.makedirs(log_dir, exist_ok=True)
 
+# HTML 파서: "lxml"(빠름, pip install lxml 필요) 또는 "html.parser"(파이썬 내장)
+parser_backend = "lxml"
+
+# 게시글마다 디버그 정보 파일을 남길지 여부
+save_debug = True
+
+# 게시판별로 마지막에 성공한 본문 영역 선택자를 저장할 파일
+selector_cache_file = os.path.join(log_dir, "content_selectors.json")
+save_selector_cache = True  # False면 이번 실행에서만 사용 (오프라인 재처리)
+debug_dir = log_dir
+
+# 단계별 지표(지연 시간 분포, 처리량)를 metrics_interval초마다 파일로 내보냄
+metrics_enabled = True
+metrics_interval = 10
+metrics_json_file = os.path.join(log_dir, "metrics.json")
+metrics_prom_file = os.path.join(log_dir, "metrics.prom")
+
+# 이미지 URL 무시/허용 규칙 파일 (없으면 기본 규칙 사용)과 판정 결과 캐시 크기
+filter_rules_file = "image_filter_rules.json"
+filter_cache_size = 100000
+
+# 조건부 요청(ETag/Last-Modified) 캐시 폴더
+cache_dir = "fomos_cache"
+use_http_cache = True
+os.makedirs(cache_dir, exist_ok=True)
+
+# 원본 응답 보관 (WARC 비슷한 형식, 규칙을 바꾼 뒤 다시 받지 않고 재처리할 때 사용)
+# fomos_cache에도 최신 본문이 있으므로 기본은 끔. 오프라인 재처리를 하려면 켜고 크롤링해야 함
+archive_enabled = False
+archive_dir = "fomos_archive"
+archive_file_max_size = 256 * 1024 * 1024  # 보관 파일 하나의 최대 크기
+
+# 오프라인 재처리: 네트워크 없이 보관된 HTML로 파싱/필터링/중복 검사만 다시 실행
+offline_reprocess = False
+offline_report_file = os.path.join(log_dir, "offline_report.json")
+# 재처리 중 디버그 파일은 따로 저장 (실행 중인 크롤러의 로그와 선택자 캐시는 건드리지 않음)
+offline_debug_dir = os.path.join(log_dir, "offline")
+
 # 요청 헤더 설정
 headers = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -29,10 +85,81 @@ end = 1791867  # 테스트를 위해 좁은 범위로 설정해도 됩니다
 
 base_url = "https://www.fomos.kr/talk/article_view?bbs_id=5&indexno="
 
-# 이미지 중복 방지를 위한 해시 저장소
-image_hashes = set()
+# 크롤링 방식: "async"(여러 요청 동시 처리), "pipeline"(단계별 작업자 + 파싱 프로세스 풀)
+# 또는 "sequential"(한 번에 하나씩)
+crawl_mode = "async"
+
+# 동시에 처리할 게시글 수 / 동시에 진행할 이미지 다운로드 수
+max_concurrent_articles = 8
+max_concurrent_images = 16
+
+# "pipeline" 모드: 파싱 프로세스 수와 단계 사이 대기열 크기
+parse_processes = os.cpu_count() or 2
+pipeline_queue_size = 64
+
+# 샤드 모드: 범위를 shard_size개씩 나눠 임대 방식으로 처리 (여러 프로세스/컴퓨터가 같은 샤드 DB를 공유)
+# state_db는 WAL 모드를 쓰므로 네트워크 공유 폴더에서는 동작하지 않습니다. 항상 로컬 디스크에 두세요.
+# 여러 컴퓨터에서 실행할 때는 컴퓨터마다 state_db를 따로 두고, shard_db만 파일 잠금을 제대로
+# 지원하는 공유 폴더에 두세요. 이때 두 컴퓨터가 같은 이미지를 받을 수 있으므로, 끝난 뒤 한 컴퓨터에서
+# merge_state_dbs로 합쳐야 중복이 정리되고 전체 고유 이미지 수가 정확해집니다.
+use_shards = False
+shard_db = "fomos_shards.db"
+shard_size = 100
+lease_seconds = 300  # 이 시간 동안 진행이 없으면 다른 작업자가 샤드를 가져감
+shard_local_workers = 2  # 이 컴퓨터에서 실행할 작업자 프로세스 수 (0이면 합치기와 요약만)
+# 샤드 실행이 끝나면 이 컴퓨터의 state_db로 합칠 다른 컴퓨터의 state_db 경로 (작업 폴더를 마운트하거나
+# 복사한 곳). 이미지 경로는 그 state_db가 있는 폴더 기준으로 찾고, 양쪽 모두 받은 이미지는 그쪽 파일을
+# 지웁니다 (pack 파일 안의 것은 남김). 같은 DB를 다시 합쳐도 됩니다.
+merge_state_dbs = []
+
+# 과도한 요청 방지: 호스트별 초당 최대 요청 수와 순간 허용량 (토큰 버킷)
+requests_per_second = 4.0
+burst_size = 4
+
+# 적응형 동시성 제어(AIMD): 응답 상태와 지연 시간에 따라 호스트별 동시 요청 수와 요청 속도를 조절
+# requests_per_second는 속도의 상한으로 사용됩니다.
+adaptive_concurrency = True
+initial_in_flight = 4
+min_in_flight = 1
+max_in_flight = 32
+min_requests_per_second = 0.5
+latency_threshold = 3.0  # 평소 응답 시간의 이 배수를 넘으면 혼잡으로 판단
+max_retries = 2  # 429/503 응답 재시도 횟수 (Retry-After만큼 기다린 뒤)
+
+# 이미지 저장 방식
+#   "flat": save_dir 한 폴더에 {index}_{번호}.{ext} (기존 방식)
+#   "fanout": 해시 앞자리로 하위 폴더를 나눠 저장 (ab/cd/해시.ext)
+#   "pack": pack_max_image_size 이하 이미지는 묶음 파일에 이어 쓰고 나머지는 fanout
+storage_backend = "flat"
+pack_dir = os.path.join(save_dir, "packs")
+pack_max_image_size = 256 * 1024
+pack_file_max_size = 1024 ** 3  # 묶음 파일 하나의 최대 크기
+
+# 이미지 스트리밍 다운로드 시 한 번에 읽을 크기와 저장할 최소 크기
+download_chunk_size = 64 * 1024
+min_image_size = 5000  # 5KB 미만은 의미 있는 이미지가 아닐 수 있음
+
+# 연결 재사용: 유지할 호스트 수와 호스트당 연결 수
+http_pool_hosts = 10
+http_pool_size = 32
+
+# 이미지 중복 방지 해시와 진행 상황(체크포인트)을 저장할 DB (로컬 디스크에 둘 것)
+state_db = "fomos_state.db"
+state_db_retries = 5  # 다른 프로세스가 쓰는 중이라 잠겨 있을 때 다시 시도할 횟수
+# True면 이전 실행이 끝낸 지점부터 이어서 진행
+resume = True
+
+# 이미지 URL 색인: 이미 받은 URL은 다시 요청하지 않고 바로 중복으로 처리
+use_url_index = True
+url_bloom_capacity = 20000000  # 예상 URL 수 (블룸 필터 크기, 약 24MB)
+url_bloom_error_rate = 0.01  # 블룸 필터 오탐률 (오탐이면 DB에서 한 번 더 확인)
+
+# 지각 해시(dHash)로 재인코딩/크기 변경된 거의 같은 이미지도 중복으로 처리할지 여부
+use_perceptual_hash = False
+# 이 해밍 거리 이하(64비트 중)면 같은 이미지로 간주
+perceptual_hash_radius = 6
+
 duplicate_count = 0
-ignored_images = set()  # 무시할 이미지 URL 패턴
 
 # 통계 추적
 stats = {
@@ -41,17 +168,1099 @@ stats = {
     "total_images_found": 0,
     "unique_images_downloaded": 0,
     "duplicates_skipped": 0,
+    "near_duplicates_skipped": 0,
+    "small_images_skipped": 0,
+    "not_modified": 0,
+    "throttled": 0,
     "errors": 0
 }
+stats_lock = threading.Lock()
+
+def add_stat(key, amount=1):
+    """여러 스레드에서 동시에 갱신해도 안전하게 통계를 증가시킵니다."""
+    with stats_lock:
+        stats[key] += amount
+
+class Histogram:
+    """지연 시간 히스토그램 (0.1ms ~ 약 100초, 구간 경계가 2^(1/4)배씩 증가)"""
+    bounds = [0.0001 * 2 ** (i / 4) for i in range(81)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def merge(self, counts, total):
+        for i, value in enumerate(counts):
+            self.counts[i] += value
+        self.total += total
+        self.count += sum(counts)
+
+    def quantile(self, q):
+        """q 분위수의 근사값 (해당 구간의 상한)"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, value in enumerate(self.counts):
+            seen += value
+            if seen >= rank:
+                return self.bounds[min(i, len(self.bounds) - 1)]
+        return self.bounds[-1]
+
+class StageTimer:
+    """with 블록의 실행 시간을 단계 히스토그램에 기록합니다."""
+    __slots__ = ("metrics", "stage", "started")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, perf_counter() - self.started)
+        return False
+
+class Metrics:
+    """단계별 카운터와 지연 시간 히스토그램
+
+    기록은 잠금 하나와 리스트 증가뿐이라 비용이 거의 없고, 집계(분위수, 처리량)는
+    내보낼 때만 계산합니다.
+    """
+    stages = ["page_fetch", "parse", "content_area", "image_fetch", "hash", "write"]
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(int)
+        self.histograms = {stage: Histogram() for stage in self.stages}
+        self.started = monotonic()
+        self.last_time = self.started
+        self.last_counters = {}
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            self.histograms[stage].observe(seconds)
+
+    def timer(self, stage):
+        return StageTimer(self, stage)
+
+    def drain(self):
+        """다른 프로세스로 넘기기 위해 기록을 꺼내고 초기화합니다."""
+        with self.lock:
+            data = {
+                "counters": dict(self.counters),
+                "histograms": {stage: (h.counts, h.total) for stage, h in self.histograms.items() if h.count}
+            }
+            self.counters = defaultdict(int)
+            self.histograms = {stage: Histogram() for stage in self.stages}
+        return data
+
+    def merge(self, data):
+        """drain()으로 꺼낸 다른 프로세스의 기록을 합칩니다."""
+        with self.lock:
+            for name, value in data["counters"].items():
+                self.counters[name] += value
+            for stage, (counts, total) in data["histograms"].items():
+                self.histograms[stage].merge(counts, total)
+
+    def snapshot(self):
+        """현재 지표를 딕셔너리로 반환합니다. 처리량은 직전 snapshot 이후 구간 기준입니다."""
+        now = monotonic()
+        with self.lock:
+            counters = dict(self.counters)
+            stages = {
+                stage: {
+                    "count": h.count,
+                    "sum_seconds": h.total,
+                    "p50": h.quantile(0.5),
+                    "p95": h.quantile(0.95),
+                    "p99": h.quantile(0.99)
+                }
+                for stage, h in self.histograms.items()
+            }
+            elapsed = max(now - self.last_time, 1e-9)
+            rates = {
+                f"{name}_per_second": (value - self.last_counters.get(name, 0)) / elapsed
+                for name, value in counters.items()
+            }
+            self.last_time = now
+            self.last_counters = counters
+        return {
+            "uptime_seconds": now - self.started,
+            "counters": counters,
+            "rates": rates,
+            "stages": stages
+        }
+
+    def describe(self):
+        """진행 상황 출력용 한 줄 요약 (시작 이후 처리량과 단계별 p50/p95)"""
+        with self.lock:
+            elapsed = max(monotonic() - self.started, 1e-9)
+            parts = [
+                f"처리량: {self.counters['articles'] / elapsed:.2f} 게시글/s, "
+                f"{self.counters['bytes'] / elapsed / 1024:.1f} KB/s"
+            ]
+            for stage, h in self.histograms.items():
+                if h.count:
+                    parts.append(f"{stage} p50 {h.quantile(0.5) * 1000:.1f}ms / p95 {h.quantile(0.95) * 1000:.1f}ms")
+        return "\n".join(parts)
+
+    def prometheus_text(self, snapshot):
+        """Prometheus 텍스트 형식으로 변환합니다 (node_exporter textfile 수집기용)."""
+        lines = []
+        for name, value in snapshot["counters"].items():
+            lines.append(f"# TYPE fomos_{name}_total counter")
+            lines.append(f"fomos_{name}_total {value}")
+        for name, value in snapshot["rates"].items():
+            lines.append(f"# TYPE fomos_{name} gauge")
+            lines.append(f"fomos_{name} {value:.3f}")
+        lines.append("# TYPE fomos_stage_seconds histogram")
+        with self.lock:
+            for stage, h in self.histograms.items():
+                cumulative = 0
+                for bound, value in zip(self.bounds_for_export(), h.counts):
+                    cumulative += value
+                    lines.append(f'fomos_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'fomos_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'fomos_stage_seconds_sum{{stage="{stage}"}} {h.total:.6f}')
+                lines.append(f'fomos_stage_seconds_count{{stage="{stage}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def bounds_for_export():
+        return [f"{bound:.6g}" for bound in Histogram.bounds]
+
+metrics = Metrics()
+
+def export_metrics():
+    """지표를 JSON과 Prometheus 텍스트 파일로 저장합니다."""
+    snapshot = metrics.snapshot()
+    try:
+        write_atomic(metrics_json_file, json.dumps(snapshot, indent=2), mode='w', encoding='utf-8')
+        write_atomic(metrics_prom_file, metrics.prometheus_text(snapshot), mode='w', encoding='utf-8')
+    except OSError as e:
+        print(f"지표 저장 중 오류: {e}")
+    return snapshot
+
+def start_metrics_exporter():
+    """metrics_interval초마다 지표를 내보내는 백그라운드 스레드를 시작합니다."""
+    def run():
+        while True:
+            sleep(metrics_interval)
+            export_metrics()
+    
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+class StateStore:
+    """다운로드한 이미지 해시와 진행 상황을 디스크(SQLite)에 저장합니다.
+
+    해시는 16바이트 BLOB을 기본 키로 저장하므로 시작 시 전부 읽어올 필요가 없고
+    메모리 사용량도 이미지 수와 무관합니다.
+    여러 프로세스가 같은 DB를 쓰므로 쓰기마다 바로 커밋해서 쓰기 잠금을 오래 잡지 않습니다.
+    """
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS image_hashes (hash BLOB PRIMARY KEY) WITHOUT ROWID")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS checkpoints (key TEXT PRIMARY KEY, last_index INTEGER)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS perceptual_hashes (hash INTEGER)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS image_urls (url_key BLOB PRIMARY KEY, hash BLOB) WITHOUT ROWID")
+        # 저장한 이미지의 위치와 원래 게시글 (fanout/pack은 파일 이름에 게시글 번호가 없음)
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS image_locations (
+            hash BLOB PRIMARY KEY, location TEXT, size INTEGER, article INTEGER, img_index INTEGER) WITHOUT ROWID""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS image_locations_article ON image_locations (article)")
+        self.conn.commit()
+
+    def _write(self, sql, params=(), many=False):
+        """쓰기를 실행하고 바로 커밋합니다. 바뀐 행 수를 반환합니다 (many면 params의 행마다 실행).
+
+        다른 프로세스가 쓰는 중이라 timeout 안에 잠금을 얻지 못하면(database is locked)
+        잠시 기다렸다가 state_db_retries번까지 다시 시도합니다.
+        """
+        for attempt in range(state_db_retries + 1):
+            try:
+                with self.lock:
+                    try:
+                        cur = self.conn.executemany(sql, params) if many else self.conn.execute(sql, params)
+                        self.conn.commit()
+                    except sqlite3.OperationalError:
+                        self.conn.rollback()
+                        raise
+                    return cur.rowcount
+            except sqlite3.OperationalError as e:
+                if attempt == state_db_retries or ("locked" not in str(e) and "busy" not in str(e)):
+                    raise
+                print(f"⚠️ 상태 DB가 잠겨 있어 다시 시도합니다 ({attempt + 1}/{state_db_retries})")
+                sleep(0.5 * (attempt + 1))
+
+    def add_hash(self, digest):
+        """처음 보는 해시면 저장하고 True를, 이미 있으면 False를 반환합니다."""
+        return self._write("INSERT OR IGNORE INTO image_hashes (hash) VALUES (?)", (digest,)) == 1
+
+    def remove_hash(self, digest):
+        """저장에 실패한 이미지의 해시를 되돌립니다."""
+        self._write("DELETE FROM image_hashes WHERE hash = ?", (digest,))
+
+    def add_perceptual_hash(self, phash):
+        # SQLite INTEGER는 부호 있는 64비트이므로 변환해서 저장
+        signed = phash - (1 << 64) if phash >= (1 << 63) else phash
+        self._write("INSERT INTO perceptual_hashes (hash) VALUES (?)", (signed,))
+
+    def perceptual_hashes(self):
+        """저장된 지각 해시를 모두 반환합니다."""
+        with self.lock:
+            rows = self.conn.execute("SELECT hash FROM perceptual_hashes").fetchall()
+        return [h + (1 << 64) if h < 0 else h for (h,) in rows]
+
+    def add_url(self, url_key, digest):
+        """이미지 URL 키와 내용 해시를 기록합니다."""
+        self._write("INSERT OR REPLACE INTO image_urls (url_key, hash) VALUES (?, ?)", (url_key, digest))
+
+    def add_location(self, digest, location, size, article, img_index):
+        """저장한 이미지의 위치와 게시글 번호를 기록합니다."""
+        self._write("INSERT OR REPLACE INTO image_locations (hash, location, size, article, img_index) VALUES (?, ?, ?, ?, ?)",
+                    (digest, location, size, article, img_index))
+
+    def get_location(self, digest):
+        """해시에 해당하는 (위치, 크기, 게시글 번호, 이미지 번호)를 반환합니다. 없으면 None"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT location, size, article, img_index FROM image_locations WHERE hash = ?", (digest,)).fetchone()
+
+    def get_url_hash(self, url_key):
+        """URL 키에 해당하는 내용 해시를 반환합니다. 없으면 None"""
+        with self.lock:
+            row = self.conn.execute("SELECT hash FROM image_urls WHERE url_key = ?", (url_key,)).fetchone()
+            return row[0] if row else None
+
+    def url_keys(self, batch_size=10000):
+        """저장된 URL 키를 조금씩 나눠 읽습니다 (전체를 메모리에 올리지 않음)."""
+        last = b""
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT url_key FROM image_urls WHERE url_key > ? ORDER BY url_key LIMIT ?",
+                    (last, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for (url_key,) in rows:
+                yield url_key
+            last = rows[-1][0]
+
+    def merge_from(self, path, first, last):
+        """다른 컴퓨터의 상태 DB를 이 DB로 합칩니다.
+
+        처음 보는 이미지는 해시와 위치(그 DB가 있는 폴더 기준으로 바꾼 경로)를 추가하고, 이미 있는
+        이미지는 그쪽 파일을 지웁니다. 위치까지 같으면 이미 합친 기록이므로 건너뜁니다.
+        (추가한 수, 중복 수, 지운 파일 수, 양쪽 모두 [first, last] 게시글에서 받은 (해시, 위치) 목록)을 반환합니다.
+        """
+        base = os.path.dirname(os.path.abspath(path))
+        other = sqlite3.connect(path, timeout=30)
+        added = duplicates = removed = 0
+        in_range = []
+        try:
+            rows = other.execute("SELECT hash, location, size, article, img_index FROM image_locations").fetchall()
+            for digest, location, size, article, img_index in rows:
+                location = resolve_location(location, base)
+                existing = self.get_location(digest)
+                if existing is not None and existing[0] == location:
+                    continue
+                if self.add_hash(digest):
+                    self.add_location(digest, location, size, article, img_index)
+                    added += 1
+                    continue
+                duplicates += 1
+                if '@' not in location and os.path.exists(location):
+                    remove_file(location)
+                    removed += 1
+                if existing is not None and first <= article <= last and first <= existing[2] <= last:
+                    in_range.append((digest, location))
+            
+            self._write("INSERT OR IGNORE INTO image_urls (url_key, hash) VALUES (?, ?)",
+                        other.execute("SELECT url_key, hash FROM image_urls").fetchall(), many=True)
+            with self.lock:
+                known = {h for (h,) in self.conn.execute("SELECT hash FROM perceptual_hashes")}
+            new_phashes = [(h,) for (h,) in other.execute("SELECT DISTINCT hash FROM perceptual_hashes") if h not in known]
+            self._write("INSERT INTO perceptual_hashes (hash) VALUES (?)", new_phashes, many=True)
+        finally:
+            other.close()
+        return added, duplicates, removed, in_range
+
+    def hash_count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM image_hashes").fetchone()[0]
+
+    def get_checkpoint(self, key):
+        """마지막으로 완료된 인덱스를 반환합니다. 없으면 None"""
+        with self.lock:
+            row = self.conn.execute("SELECT last_index FROM checkpoints WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else None
+
+    def set_checkpoint(self, key, last_index):
+        self._write("INSERT OR REPLACE INTO checkpoints (key, last_index) VALUES (?, ?)", (key, last_index))
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+class ProgressTracker:
+    """순서 없이 끝나는 게시글 중 앞에서부터 연속으로 완료된 마지막 인덱스를 체크포인트로 기록합니다."""
+    def __init__(self, store, key, first_index):
+        self.store = store
+        self.key = key
+        self.next_index = first_index
+        self.done = set()
+        self.lock = threading.Lock()
+
+    def mark_done(self, index):
+        with self.lock:
+            self.done.add(index)
+            advanced = False
+            while self.next_index in self.done:
+                self.done.remove(self.next_index)
+                self.next_index += 1
+                advanced = True
+            if advanced:
+                self.store.set_checkpoint(self.key, self.next_index - 1)
+
+class ShardStore:
+    """인덱스 범위를 샤드로 나누고, 작업자가 샤드를 임대(lease)해서 처리하도록 관리합니다.
+
+    여러 컴퓨터가 공유 폴더의 같은 DB를 쓰면 하나의 범위를 함께 나눠 처리할 수 있습니다.
+    임대 기간 동안 진행 기록이 없는 샤드는 죽은 작업자의 것으로 보고 다른 작업자가 다시 가져갑니다.
+    ProgressTracker가 체크포인트를 기록할 때마다 임대 기간도 연장됩니다.
+    """
+    def __init__(self, path, job):
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.job = job
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.base_stats = {}
+        self.claim_stats = {}
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS shards (
+            job TEXT,
+            shard_start INTEGER,
+            shard_end INTEGER,
+            owner TEXT,
+            lease_expires REAL,
+            last_done INTEGER,
+            finished INTEGER DEFAULT 0,
+            stats TEXT,
+            PRIMARY KEY (job, shard_start))""")
+        # merge_state_dbs로 찾은 컴퓨터 사이 중복 (양쪽 모두 고유 이미지로 셌으므로 합계에서 뺌)
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS cross_duplicates (
+            job TEXT, hash BLOB, location TEXT, PRIMARY KEY (job, hash, location))""")
+
+    def plan(self, first, last, size):
+        """범위를 size개씩 샤드로 나눠 등록합니다. 이미 등록된 샤드는 그대로 둡니다."""
+        shards = [(self.job, s, min(s + size - 1, last), s - 1) for s in range(first, last + 1, size)]
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO shards (job, shard_start, shard_end, last_done) VALUES (?, ?, ?, ?)", shards)
+            self.conn.execute("COMMIT")
+
+    def claim(self):
+        """처리할 샤드를 하나 임대합니다. (시작, 끝, 마지막 완료 인덱스) 또는 남은 샤드가 없으면 None"""
+        with self.lock:
+            now = time.time()
+            self.conn.execute("BEGIN IMMEDIATE")
+            row = self.conn.execute(
+                """SELECT shard_start, shard_end, last_done, stats FROM shards
+                   WHERE job = ? AND finished = 0 AND (owner IS NULL OR owner = ? OR lease_expires < ?)
+                   ORDER BY shard_start LIMIT 1""", (self.job, self.worker, now)).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE shards SET owner = ?, lease_expires = ? WHERE job = ? AND shard_start = ?",
+                    (self.worker, now + lease_seconds, self.job, row[0]))
+            self.conn.execute("COMMIT")
+        if row is None:
+            return None
+        # 죽은 작업자가 남긴 중간 통계에 이어서 누적
+        self.base_stats = json.loads(row[3]) if row[3] else {}
+        with stats_lock:
+            self.claim_stats = dict(stats)
+        return row[0], row[1], row[2]
+
+    def shard_stats(self):
+        """임대 이후 이 샤드에서 발생한 통계 (이전 작업자 몫 포함)"""
+        with stats_lock:
+            current = dict(stats)
+        return {key: self.base_stats.get(key, 0) + current[key] - self.claim_stats.get(key, 0) for key in current}
+
+    def set_checkpoint(self, shard_start, last_index):
+        """진행 상황과 중간 통계를 기록하고 임대 기간을 연장합니다."""
+        with self.lock:
+            cur = self.conn.execute(
+                """UPDATE shards SET last_done = ?, lease_expires = ?, stats = ?
+                   WHERE job = ? AND shard_start = ? AND owner = ?""",
+                (last_index, time.time() + lease_seconds, json.dumps(self.shard_stats()),
+                 self.job, shard_start, self.worker))
+        if cur.rowcount == 0:
+            print(f"⚠️ 샤드 {shard_start}의 임대가 다른 작업자에게 넘어갔습니다.")
+
+    def finish(self, shard_start):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE shards SET finished = 1, owner = NULL, stats = ? WHERE job = ? AND shard_start = ? AND owner = ?",
+                (json.dumps(self.shard_stats()), self.job, shard_start, self.worker))
+
+    def add_cross_duplicates(self, duplicates):
+        """컴퓨터 사이 중복 (해시, 지운 쪽 위치)를 기록합니다. 이미 기록된 것은 무시합니다."""
+        with self.lock:
+            self.conn.executemany("INSERT OR IGNORE INTO cross_duplicates (job, hash, location) VALUES (?, ?, ?)",
+                                  [(self.job, digest, location) for digest, location in duplicates])
+
+    def summary(self):
+        """모든 샤드의 통계를 합치고 컴퓨터 사이 중복을 뺍니다. (합계, 완료된 샤드 수, 전체 샤드 수)"""
+        with self.lock:
+            rows = self.conn.execute("SELECT finished, stats FROM shards WHERE job = ?", (self.job,)).fetchall()
+            cross = self.conn.execute("SELECT COUNT(*) FROM cross_duplicates WHERE job = ?", (self.job,)).fetchone()[0]
+        totals = {key: 0 for key in stats}
+        for _, shard_stats in rows:
+            for key, value in json.loads(shard_stats or "{}").items():
+                totals[key] = totals.get(key, 0) + value
+        totals["unique_images_downloaded"] -= cross
+        totals["duplicates_skipped"] += cross
+        return totals, sum(finished for finished, _ in rows), len(rows)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class NearDuplicateIndex:
+    """64비트 지각 해시를 해밍 거리로 검색하는 다중 인덱스 해시 테이블
+
+    해시를 16비트 조각 4개로 나누면 거리가 radius 이하인 두 해시는 적어도 한 조각에서
+    radius // 4 비트 이하만 다릅니다. 그래서 조각마다 그 범위의 이웃 값만 찾아보면
+    수십만 개가 저장되어 있어도 후보가 몇 개 되지 않습니다.
+    """
+    chunks = 4
+    chunk_bits = 16
+
+    def __init__(self, radius):
+        self.radius = radius
+        self.tables = [defaultdict(list) for _ in range(self.chunks)]
+        self.lock = threading.Lock()
+        self.size = 0
+        # 조각 하나에서 뒤집어 볼 비트 조합 (probe_radius 비트 이하)
+        probe_radius = radius // self.chunks
+        self.probes = [0]
+        for bits in range(1, probe_radius + 1):
+            self.probes += [mask for mask in range(1 << self.chunk_bits) if mask.bit_count() == bits]
+
+    def _parts(self, phash):
+        mask = (1 << self.chunk_bits) - 1
+        return [(phash >> (i * self.chunk_bits)) & mask for i in range(self.chunks)]
+
+    def find(self, phash):
+        """거리가 radius 이하인 저장된 해시를 반환합니다. 없으면 None"""
+        for table, part in zip(self.tables, self._parts(phash)):
+            for probe in self.probes:
+                for other in table.get(part ^ probe, ()):
+                    if (phash ^ other).bit_count() <= self.radius:
+                        return other
+        return None
+
+    def add(self, phash):
+        for table, part in zip(self.tables, self._parts(phash)):
+            table[part].append(phash)
+        self.size += 1
+
+    def add_if_new(self, phash):
+        """비슷한 해시가 없으면 추가하고 None을, 있으면 그 해시를 반환합니다."""
+        with self.lock:
+            found = self.find(phash)
+            if found is None:
+                self.add(phash)
+            return found
+
+class BloomFilter:
+    """고정 크기 비트 배열로 "확실히 없음"을 빠르게 판단하는 블룸 필터
+
+    capacity개를 넣었을 때 오탐률이 error_rate가 되도록 크기를 정하므로 메모리 사용량이
+    고정됩니다 (2천만 개, 1%에 약 24MB). 키는 이미 골고루 섞인 해시이므로 앞뒤 8바이트를
+    두 해시 값으로 써서 위치를 계산합니다 (double hashing).
+    """
+    def __init__(self, capacity, error_rate):
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.lock = threading.Lock()
+
+    def _positions(self, key):
+        h1 = int.from_bytes(key[:8], 'little')
+        h2 = int.from_bytes(key[8:16], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        with self.lock:
+            for pos in self._positions(key):
+                self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+state_store = StateStore(state_db)
+
+url_bloom = None
+url_bloom_lock = threading.Lock()
+
+def get_url_bloom():
+    """저장된 URL 키로 블룸 필터를 만듭니다 (처음 한 번만)."""
+    global url_bloom
+    with url_bloom_lock:
+        if url_bloom is None:
+            bloom = BloomFilter(url_bloom_capacity, url_bloom_error_rate)
+            for url_key in state_store.url_keys():
+                bloom.add(url_key)
+            url_bloom = bloom
+        return url_bloom
+
+def image_url_key(url):
+    """이미지 URL을 정규화(스킴/호스트 소문자, # 이후 제거)한 뒤 16바이트 키로 만듭니다."""
+    parts = urlsplit(url)
+    normalized = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', parts.query, ''))
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).digest()
+
+def is_known_image_url(url):
+    """이전에 받은(또는 중복으로 확인한) 이미지 URL이면 True"""
+    url_key = image_url_key(url)
+    # 블룸 필터에 없으면 DB를 볼 필요가 없음
+    if url_key not in get_url_bloom():
+        return False
+    return state_store.get_url_hash(url_key) is not None
+
+def remember_image_url(url, digest):
+    """이미지 URL과 내용 해시를 색인에 추가합니다."""
+    if not use_url_index:
+        return
+    url_key = image_url_key(url)
+    state_store.add_url(url_key, digest)
+    get_url_bloom().add(url_key)
+
+def skip_known_url(img_url):
+    """이미 알고 있는 URL이면 요청하지 않고 중복으로 기록합니다. 건너뛰었으면 True"""
+    if not use_url_index or not is_known_image_url(img_url):
+        return False
+    print(f"✗ 중복 이미지 무시 (이미 받은 URL): {img_url}")
+    add_stat("duplicates_skipped")
+    metrics.count("url_index_hits")
+    return True
+
+near_duplicate_index = None
+near_duplicate_index_lock = threading.Lock()
+
+def get_near_duplicate_index():
+    """저장된 지각 해시로 검색 인덱스를 만듭니다 (처음 한 번만)."""
+    global near_duplicate_index
+    with near_duplicate_index_lock:
+        if near_duplicate_index is None:
+            index = NearDuplicateIndex(perceptual_hash_radius)
+            for phash in state_store.perceptual_hashes():
+                index.add(phash)
+            near_duplicate_index = index
+        return near_duplicate_index
+
+# 임시 파일로 받은 이미지 (저장 여부 결정 전)
+DownloadedImage = namedtuple("DownloadedImage", ["url", "tmp_path", "hash", "ext", "size", "response"])
+
+class TokenBucket:
+    """초당 rate개의 토큰이 채워지는 토큰 버킷 (최대 capacity개)"""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """토큰을 하나 얻을 때까지 대기합니다."""
+        while True:
+            with self.lock:
+                now = monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            sleep(wait)
+
+class AdaptiveLimiter:
+    """AIMD 방식으로 한 호스트의 동시 요청 수와 초당 요청 수를 조절합니다.
+
+    성공 응답이 현재 한도만큼 이어지면 한도를 1, 속도를 상한의 1/20만큼 올리고(가산 증가),
+    429/5xx/타임아웃이나 평소보다 훨씬 느린 응답이 오면 둘 다 절반으로 줄입니다(승법 감소).
+    Retry-After를 받으면 그 시간 동안 이 호스트로 새 요청을 보내지 않습니다.
+    """
+    decrease_cooldown = 1.0  # 이미 보낸 요청들이 한꺼번에 실패해도 한 번만 줄이도록
+    min_latency_samples = 20
+
+    def __init__(self, host, bucket):
+        self.host = host
+        self.bucket = bucket
+        self.limit = min(initial_in_flight, max_in_flight)
+        self.in_flight = 0
+        self.successes = 0
+        self.latency_avg = None
+        self.samples = 0
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.changes = deque(maxlen=10)
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """동시 요청 한도 안에 들고 Retry-After 대기가 끝날 때까지 기다립니다."""
+        with self.condition:
+            while True:
+                wait = self.paused_until - monotonic()
+                if wait <= 0 and self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                self.condition.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, latency, status=None, error=None, retry_after=None):
+        """요청 결과를 반영해 한도를 조절합니다."""
+        with self.condition:
+            self.in_flight -= 1
+            now = monotonic()
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            
+            reason = None
+            if error is not None:
+                reason = f"요청 오류 ({type(error).__name__})"
+            elif status == 429 or status >= 500:
+                reason = f"상태코드 {status}"
+            elif self.samples >= self.min_latency_samples and latency > latency_threshold * self.latency_avg:
+                reason = f"지연 증가 ({latency * 1000:.0f}ms, 평소 {self.latency_avg * 1000:.0f}ms)"
+            
+            if error is None and status < 500 and status != 429:
+                # 평소 지연 시간 (지수 이동 평균)
+                self.latency_avg = latency if self.latency_avg is None else self.latency_avg * 0.9 + latency * 0.1
+                self.samples += 1
+            
+            if reason:
+                self.successes = 0
+                if now - self.last_decrease >= self.decrease_cooldown:
+                    self.last_decrease = now
+                    self._change(max(min_in_flight, self.limit // 2),
+                                 max(min_requests_per_second, self.bucket.rate / 2), reason)
+            else:
+                self.successes += 1
+                if self.successes >= self.limit:
+                    self.successes = 0
+                    rate_step = max(0.5, requests_per_second / 20)
+                    if self.limit < max_in_flight or self.bucket.rate < requests_per_second:
+                        self._change(min(max_in_flight, self.limit + 1),
+                                     min(requests_per_second, self.bucket.rate + rate_step), "안정적인 응답")
+            self.condition.notify_all()
+
+    def _change(self, limit, rate, reason):
+        old_limit, old_rate = self.limit, self.bucket.rate
+        self.limit = limit
+        self.bucket.rate = rate
+        self.changes.append(f"{datetime.now():%H:%M:%S} 동시 {old_limit}→{limit}, 초당 {old_rate:.1f}→{rate:.1f} ({reason})")
+        if limit < old_limit or rate < old_rate:
+            print(f"⚠️ {self.host} 요청 줄임: 동시 {old_limit}→{limit}, 초당 {old_rate:.1f}→{rate:.1f} ({reason})")
+
+    def describe(self):
+        with self.condition:
+            lines = [f"{self.host}: 동시 요청 한도 {self.limit} (진행 중 {self.in_flight}), 초당 {self.bucket.rate:.1f}회"]
+            lines += [f"  {change}" for change in list(self.changes)[-3:]]
+        return "\n".join(lines)
+
+HostControl = namedtuple("HostControl", ["bucket", "limiter"])
+host_controls = {}
+host_controls_lock = threading.Lock()
+
+def get_host_control(url):
+    """요청 대상 호스트의 토큰 버킷과 동시성 제어기를 반환합니다."""
+    host = urlparse(url).netloc
+    with host_controls_lock:
+        control = host_controls.get(host)
+        if control is None:
+            bucket = TokenBucket(requests_per_second, burst_size)
+            control = host_controls[host] = HostControl(bucket, AdaptiveLimiter(host, bucket))
+        return control
+
+def describe_host_controls():
+    """진행 상황 출력용: 호스트별 현재 동시성/속도와 최근 변경 이유"""
+    with host_controls_lock:
+        controls = list(host_controls.values())
+    return "\n".join(control.limiter.describe() for control in controls)
+
+def parse_retry_after(value):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초 단위로 바꿉니다. 없거나 잘못되면 None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def create_session():
+    """연결을 재사용하는 공용 세션을 만듭니다."""
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=http_pool_hosts, pool_maxsize=http_pool_size, pool_block=True)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+session = create_session()
+
+def cache_path(url, suffix):
+    """URL에 해당하는 캐시 파일 경로를 반환합니다."""
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, key[:2], f"{key}.{suffix}")
+
+def load_cache_entry(url):
+    """저장된 캐시 정보(ETag, Last-Modified 등)를 읽어옵니다. 없으면 None"""
+    try:
+        with open(cache_path(url, "json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_atomic(path, data, mode='wb', encoding=None):
+    """임시 파일에 쓴 뒤 이름을 바꿔 중간에 끊겨도 파일이 깨지지 않게 합니다."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, mode, encoding=encoding) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def store_cache_entry(url, response, body=None, rejected=False):
+    """응답의 ETag/Last-Modified를 저장합니다. body가 있으면 본문도 함께 저장합니다.
+
+    rejected가 True면 저장하지 않기로 한 이미지(너무 작은 이미지)로 표시합니다.
+    """
+    if not use_http_cache:
+        return
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if not etag and not last_modified:
+        return
+    try:
+        if body is not None:
+            write_atomic(cache_path(url, "body"), body)
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_type": response.headers.get('Content-Type', ''),
+            "encoding": response.encoding,
+            "has_body": body is not None,
+            "rejected": rejected
+        }
+        write_atomic(cache_path(url, "json"), json.dumps(entry, ensure_ascii=False), mode='w', encoding='utf-8')
+    except OSError as e:
+        print(f"캐시 저장 중 오류: {e}")
+
+def load_cached_body(url, entry):
+    """캐시에 저장된 본문을 문자열로 읽어옵니다. 없으면 None"""
+    if not entry or not entry.get("has_body"):
+        return None
+    try:
+        with open(cache_path(url, "body"), 'rb') as f:
+            return f.read().decode(entry.get("encoding") or 'utf-8', errors='replace')
+    except OSError:
+        return None
+
+def http_get(url, timeout, cache_entry=None, stream=False):
+    """속도 제한을 지킨 뒤 GET 요청을 보냅니다. cache_entry가 있으면 조건부 요청을 보냅니다."""
+    request_headers = {}
+    if cache_entry:
+        if cache_entry.get("etag"):
+            request_headers['If-None-Match'] = cache_entry["etag"]
+        if cache_entry.get("last_modified"):
+            request_headers['If-Modified-Since'] = cache_entry["last_modified"]
+    control = get_host_control(url)
+    
+    for attempt in range(max_retries + 1):
+        if adaptive_concurrency:
+            control.limiter.acquire()
+        control.bucket.acquire()
+        started = monotonic()
+        try:
+            response = session.get(url, headers=request_headers, timeout=timeout, stream=stream)
+        except requests.RequestException as e:
+            if adaptive_concurrency:
+                control.limiter.release(monotonic() - started, error=e)
+            raise
+        
+        status = response.status_code
+        retry_after = None
+        if status == 429 or status >= 500:
+            add_stat("throttled")
+            if status in (429, 503):
+                # Retry-After가 없으면 지수적으로 기다림
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if retry_after is None:
+                    retry_after = 2 ** attempt
+        if adaptive_concurrency:
+            control.limiter.release(monotonic() - started, status=status, retry_after=retry_after)
+        
+        if retry_after is None or attempt == max_retries:
+            return response
+        response.close()
+        if not adaptive_concurrency:
+            sleep(retry_after)
+
+class ArticleArchive:
+    """가져온 게시글 HTML을 압축된 보관 파일에 이어 씁니다 (WARC 비슷한 형식).
+
+    레코드마다 WARC 형식의 헤더와 본문을 별도의 gzip 멤버로 기록하므로, 파일 전체를
+    풀지 않고 위치만 알면 레코드 하나를 바로 읽을 수 있습니다. 같은 이름의 .cdx 파일에
+    "URL, 위치, 길이, 시각, 본문 해시"를 한 줄씩 추가하고, 같은 URL의 본문이 바뀌지
+    않았으면 다시 기록하지 않습니다. 작업자마다 따로 파일을 씁니다.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.worker = f"{socket.gethostname()}-{os.getpid()}"
+        self.lock = threading.Lock()
+        self.archive = None
+        self.index_file = None
+        self.sequence = 0
+        self.lookup = None
+
+    def _open_next(self):
+        """새 보관 파일을 엽니다 (기존 파일 번호 다음부터)."""
+        self._close()
+        os.makedirs(self.directory, exist_ok=True)
+        while True:
+            self.sequence += 1
+            base = os.path.join(self.directory, f"articles-{self.worker}-{self.sequence:05d}")
+            if not os.path.exists(f"{base}.warc.gz"):
+                break
+        self.archive = open(f"{base}.warc.gz", 'ab')
+        self.index_file = open(f"{base}.cdx", 'a', encoding='utf-8')
+
+    def _close(self):
+        if self.archive:
+            self.archive.close()
+            self.index_file.close()
+            self.archive = self.index_file = None
+
+    def load_index(self):
+        """모든 .cdx 파일을 읽어 URL -> (보관 파일 경로, 위치, 길이, 본문 해시) 표를 만듭니다. 나중 기록이 우선합니다."""
+        lookup = {}
+        if os.path.isdir(self.directory):
+            for filename in sorted(os.listdir(self.directory)):
+                if not filename.endswith('.cdx'):
+                    continue
+                archive_path = os.path.join(self.directory, filename[:-4] + '.warc.gz')
+                with open(os.path.join(self.directory, filename), 'r', encoding='utf-8') as f:
+                    for line in f:
+                        fields = line.rstrip('\n').split('\t')
+                        if len(fields) != 5:
+                            continue  # 기록 중 끊긴 줄
+                        url, offset, length, _, digest = fields
+                        lookup[url] = (archive_path, int(offset), int(length), digest)
+        return lookup
+
+    def put(self, url, body, encoding):
+        """본문을 보관합니다. 같은 URL에 같은 본문이 이미 있으면 건너뜁니다."""
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        header = (
+            "WARC/1.0\r\n"
+            "WARC-Type: response\r\n"
+            f"WARC-Target-URI: {url}\r\n"
+            f"WARC-Date: {now}\r\n"
+            f"Content-Type: text/html; charset={encoding or 'utf-8'}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "\r\n"
+        ).encode('utf-8')
+        record = gzip.compress(header + body + b"\r\n\r\n")
+        
+        with self.lock:
+            if self.lookup is None:
+                self.lookup = self.load_index()
+            known = self.lookup.get(url)
+            if known and known[3] == digest:
+                return
+            if self.archive is None or self.archive.tell() + len(record) > archive_file_max_size:
+                self._open_next()
+            offset = self.archive.tell()
+            self.archive.write(record)
+            self.archive.flush()
+            # 레코드가 기록된 뒤에 인덱스를 추가
+            self.index_file.write(f"{url}\t{offset}\t{len(record)}\t{now}\t{digest}\n")
+            self.index_file.flush()
+            self.lookup[url] = (self.archive.name, offset, len(record), digest)
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+def read_archive_record(path, offset, length):
+    """보관 파일에서 레코드 하나를 읽어 HTML 문자열로 반환합니다."""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = gzip.decompress(f.read(length))
+    head, _, body = data.partition(b"\r\n\r\n")
+    encoding = 'utf-8'
+    for line in head.decode('utf-8', errors='replace').split("\r\n"):
+        name, _, value = line.partition(":")
+        if name.lower() == "content-type" and "charset=" in value:
+            encoding = value.split("charset=", 1)[1].strip()
+        elif name.lower() == "content-length":
+            body = body[:int(value)]
+    return body.decode(encoding, errors='replace')
+
+article_archive = None
+article_archive_lock = threading.Lock()
+
+def get_article_archive():
+    """게시글 보관 파일을 엽니다 (처음 한 번만)."""
+    global article_archive
+    with article_archive_lock:
+        if article_archive is None:
+            article_archive = ArticleArchive(archive_dir)
+        return article_archive
+
+def fetch_page(url):
+    """게시글 HTML을 가져옵니다. 변경이 없으면(304) 캐시된 본문을 사용합니다. 실패하면 None"""
+    entry = load_cache_entry(url) if use_http_cache else None
+    if entry and not entry.get("has_body"):
+        entry = None
+    
+    with metrics.timer("page_fetch"):
+        response = http_get(url, timeout=15, cache_entry=entry)
+    if response.status_code == 304:
+        text = load_cached_body(url, entry)
+        if text is not None:
+            add_stat("not_modified")
+            return text
+        # 캐시 본문이 사라졌으면 조건 없이 다시 요청
+        with metrics.timer("page_fetch"):
+            response = http_get(url, timeout=15)
+    
+    if response.status_code != 200:
+        print(f"✗ 페이지 접근 실패 (상태코드: {response.status_code})")
+        return None
+    
+    metrics.count("bytes", len(response.content))
+    store_cache_entry(url, response, response.content)
+    if archive_enabled:
+        try:
+            get_article_archive().put(url, response.content, response.encoding)
+        except OSError as e:
+            print(f"응답 보관 중 오류: {e}")
+    return response.text
 
 def get_image_hash(img_data):
-    """이미지 데이터의 MD5 해시를 계산합니다."""
-    return hashlib.md5(img_data).hexdigest()
+    """이미지 데이터의 BLAKE2b(16바이트) 해시를 계산합니다."""
+    return hashlib.blake2b(img_data, digest_size=16).digest()
+
+def get_perceptual_hash(path):
+    """dHash: 9x8 흑백으로 축소한 뒤 가로로 이웃한 픽셀의 밝기를 비교해 64비트 해시를 만듭니다."""
+    # use_perceptual_hash를 켤 때만 필요 (기본 크롤링은 Pillow/numpy 없이 실행)
+    from PIL import Image
+    import numpy as np
+    with Image.open(path) as img:
+        img.draft('L', (64, 64))  # JPEG는 디코딩 단계에서 바로 축소
+        small = img.convert('L').resize((9, 8), Image.LANCZOS)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def is_near_duplicate(image):
+    """이미 저장한 이미지와 지각적으로 거의 같은지 확인하고, 아니면 인덱스에 등록합니다."""
+    try:
+        phash = get_perceptual_hash(image.tmp_path)
+    except Exception as e:
+        print(f"지각 해시 계산 실패 (정확한 해시로만 비교): {e}")
+        return False
+    
+    if get_near_duplicate_index().add_if_new(phash) is not None:
+        return True
+    state_store.add_perceptual_hash(phash)
+    return False
+
+def get_parser():
+    """사용할 HTML 파서 이름을 반환합니다. lxml이 없으면 기본 내장 파서를 사용합니다."""
+    global parser_backend
+    if parser_backend == "lxml":
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            print("⚠️ lxml이 설치되어 있지 않아 html.parser를 사용합니다. (pip install lxml)")
+            parser_backend = "html.parser"
+    return parser_backend
+
+def measure_tree(soup):
+    """트리를 한 번만 훑어 각 태그의 텍스트 길이(.text.strip() 기준)와 하위 이미지 수를 계산합니다.
+
+    문서 역순으로 돌면 자식이 항상 부모보다 먼저 계산되므로, 태그마다 자식 값만 합치면 됩니다.
+    반환값은 id(tag) -> (텍스트 길이, 이미지 수) 딕셔너리입니다.
+    """
+    # id(node) -> (전체 길이, 앞쪽 공백 길이, 뒤쪽 공백 길이, 자신을 포함한 이미지 수)
+    spans = {}
+    measures = {}
+    for node in reversed(list(soup.descendants)):
+        if isinstance(node, Tag):
+            length = lead = trail = images = 0
+            for child in node.children:
+                span = spans.get(id(child))
+                if span is None:
+                    continue
+                child_length, child_lead, child_trail, child_images = span
+                # 지금까지 전부 공백이면 앞쪽 공백이 이어짐
+                if lead == length:
+                    lead = length + child_lead
+                # 자식이 전부 공백이면 뒤쪽 공백이 이어짐
+                trail = trail + child_length if child_trail == child_length else child_trail
+                length += child_length
+                images += child_images
+            stripped = length - lead - trail if lead < length else 0
+            measures[id(node)] = (stripped, images)
+            # 부모에게 넘길 이미지 수에는 자기 자신도 포함
+            spans[id(node)] = (length, lead, trail, images + (node.name == 'img'))
+        elif type(node) in (NavigableString, CData):
+            text = str(node)
+            spans[id(node)] = (len(text), len(text) - len(text.lstrip()), len(text) - len(text.rstrip()), 0)
+    return measures
+
+def text_length(measures, tag):
+    return measures[id(tag)][0]
 
-def save_debug_info(index, soup):
+def image_count(measures, tag):
+    return measures[id(tag)][1]
+
+def save_debug_info(index, soup, measures=None):
     """디버깅을 위해 HTML 구조 정보를 저장합니다."""
     try:
-        debug_file = os.path.join(log_dir, f"debug_{index}.txt")
+        if measures is None:
+            measures = measure_tree(soup)
+        debug_file = os.path.join(debug_dir, f"debug_{index}.txt")
         with open(debug_file, 'w', encoding='utf-8') as f:
             # 페이지 제목
             title = soup.title.string if soup.title else "제목 없음"
@@ -61,8 +1270,8 @@ def save_debug_info(index, soup):
             f.write("=== 가능한 본문 영역 ===\n")
             for div in soup.find_all('div', class_=True):
                 class_name = ' '.join(div.get('class'))
-                img_count = len(div.find_all('img'))
-                text_len = len(div.text.strip())
+                img_count = image_count(measures, div)
+                text_len = text_length(measures, div)
                 if img_count > 0 or text_len > 200:  # 이미지가 있거나 텍스트가 많은 div
                     f.write(f"클래스: {class_name}, 이미지 수: {img_count}, 텍스트 길이: {text_len}\n")
             
@@ -84,35 +1293,94 @@ def save_debug_info(index, soup):
     except Exception as e:
         print(f"디버그 정보 저장 중 오류: {e}")
 
-def should_ignore_image(url):
-    """무시해야 할 이미지인지 확인합니다."""
-    # 무시할 URL 패턴 (광고, 아이콘, UI 요소 등)
-    ignore_patterns = [
-        'banner', 'logo', 'icon', 'button', 
+# 기본 이미지 URL 규칙 (filter_rules_file이 없을 때 사용)
+default_filter_rules = {
+    # 무시할 URL 패턴 (광고, 아이콘, UI 요소 등) - 대소문자 구분 없이 부분 일치
+    "ignore": [
+        'banner', 'logo', 'icon', 'button',
         'header', 'footer', 'nav', 'avatar',
         'bg_', 'background', 'ad_', 'ads_',
         'emoji', 'emoticon', 'thumbnail'
-    ]
-    
-    url_lower = url.lower()
-    
-    # 이미 무시 목록에 있는 URL 패턴
-    if url in ignored_images:
-        return True
-        
-    # 패턴 매치 확인
-    for pattern in ignore_patterns:
-        if pattern in url_lower:
-            ignored_images.add(url)
-            return True
-            
-    return False
+    ],
+    # 무시 패턴에 걸려도 받을 URL 패턴 (무시 규칙보다 우선)
+    "allow": [],
+    # 부분 일치로 표현하기 어려운 규칙은 정규식으로
+    "ignore_regex": [],
+    "allow_regex": []
+}
+
+def compile_patterns(substrings, regexes):
+    """부분 일치 패턴과 정규식을 하나의 정규식으로 합칩니다. 규칙이 없으면 None
+
+    정규식은 하나씩 먼저 검사해서 잘못된 것(문법 오류, 중간에 있는 (?i) 같은 전역 플래그)은
+    경고를 출력하고 뺍니다.
+    """
+    parts = [re.escape(pattern.lower()) for pattern in substrings]
+    for pattern in regexes:
+        try:
+            re.compile(f"(?:{pattern})", re.I)
+        except (re.error, TypeError) as e:
+            print(f"⚠️ 잘못된 이미지 규칙 정규식을 건너뜁니다: {pattern!r} ({e})")
+            continue
+        parts.append(f"(?:{pattern})")
+    if not parts:
+        return None
+    return re.compile("|".join(parts), re.I)
+
+def load_filter_rules():
+    """규칙 파일을 읽어 (허용 정규식, 무시 정규식)으로 컴파일합니다.
+
+    파일을 읽을 수 없거나 규칙을 합친 정규식이 컴파일되지 않으면 기본 규칙을 사용합니다.
+    """
+    rules = default_filter_rules
+    if os.path.exists(filter_rules_file):
+        try:
+            with open(filter_rules_file, 'r', encoding='utf-8') as f:
+                rules = {**default_filter_rules, **json.load(f)}
+            return (compile_patterns(rules["allow"], rules["allow_regex"]),
+                    compile_patterns(rules["ignore"], rules["ignore_regex"]))
+        except (OSError, ValueError, TypeError, AttributeError, re.error) as e:
+            print(f"⚠️ 이미지 규칙 파일을 사용할 수 없어 기본 규칙을 사용합니다: {e}")
+            rules = default_filter_rules
+    allow = compile_patterns(rules["allow"], rules["allow_regex"])
+    ignore = compile_patterns(rules["ignore"], rules["ignore_regex"])
+    return allow, ignore
+
+allow_pattern, ignore_pattern = load_filter_rules()
+
+@lru_cache(maxsize=filter_cache_size)
+def url_verdict(url):
+    """URL을 무시해야 하면 True (결과는 크기가 제한된 LRU 캐시에 보관)"""
+    if allow_pattern is not None and allow_pattern.search(url):
+        return False
+    return ignore_pattern is not None and ignore_pattern.search(url) is not None
+
+def reload_filter_rules():
+    """규칙 파일을 다시 읽고 캐시를 비웁니다."""
+    global allow_pattern, ignore_pattern
+    allow_pattern, ignore_pattern = load_filter_rules()
+    url_verdict.cache_clear()
+
+def describe_filter_cache():
+    info = url_verdict.cache_info()
+    total = info.hits + info.misses
+    rate = info.hits / total * 100 if total else 0.0
+    return f"URL 필터 캐시: 적중률 {rate:.1f}% (적중 {info.hits}, 미적중 {info.misses}, 보관 {info.currsize}/{info.maxsize})"
+
+def should_ignore_image(url):
+    """무시해야 할 이미지인지 확인합니다."""
+    return url_verdict(url)
+
+# 본문 이미지 판별에 쓰는 단어 (매번 리스트를 만들지 않도록 미리 준비)
+non_content_alt_pattern = re.compile('logo|icon|banner', re.I)
+content_image_classes = frozenset(['content', 'article', 'post', 'image'])
+content_parent_classes = frozenset(['content', 'article', 'post', 'text'])
 
 def is_valid_content_image(img_tag):
     """이미지가 본문 내용의 일부인지 확인합니다."""
     # 1. alt 텍스트가 있으면 본문 이미지일 가능성 높음
     alt = img_tag.get('alt', '')
-    if alt and len(alt) > 5 and not any(x in alt.lower() for x in ['logo', 'icon', 'banner']):
+    if alt and len(alt) > 5 and not non_content_alt_pattern.search(alt):
         return True
         
     # 2. 크기가 큰 이미지는 본문 이미지일 가능성 높음
@@ -126,15 +1394,15 @@ def is_valid_content_image(img_tag):
             pass
             
     # 3. 특정 CSS 클래스나 ID를 가진 이미지
-    classes = img_tag.get('class', [])
-    if classes and any(c in [c.lower() for c in classes] for c in ['content', 'article', 'post', 'image']):
+    classes = img_tag.get('class')
+    if classes and not content_image_classes.isdisjoint(c.lower() for c in classes):
         return True
         
     # 4. 부모 태그의 클래스/ID 확인
     parent = img_tag.parent
     if parent:
-        parent_classes = parent.get('class', [])
-        if parent_classes and any(c in [c.lower() for c in parent_classes] for c in ['content', 'article', 'post', 'text']):
+        parent_classes = parent.get('class')
+        if parent_classes and not content_parent_classes.isdisjoint(c.lower() for c in parent_classes):
             return True
             
     return False
@@ -153,209 +1421,970 @@ def normalize_url(url, base):
     
     return full_url
 
-def download_image(img_url, index, img_index):
-    """이미지를 다운로드하고 중복 체크를 수행합니다."""
-    global duplicate_count
-    
+def image_extension(content_type):
+    """Content-Type으로 확장자를 결정합니다."""
+    ext = 'jpg'  # 기본 확장자
+    if 'png' in content_type:
+        ext = 'png'
+    elif 'gif' in content_type:
+        ext = 'gif'
+    elif 'jpeg' in content_type or 'jpg' in content_type:
+        ext = 'jpg'
+    return ext
+
+def remove_file(path):
+    """파일이 있으면 삭제합니다."""
     try:
-        # URL 검증
-        if not img_url or should_ignore_image(img_url):
-            return False
-            
-        # 이미지 다운로드
-        img_response = requests.get(img_url, headers=headers, timeout=10)
+        os.remove(path)
+    except OSError:
+        pass
+
+def resolve_location(location, base):
+    """다른 컴퓨터의 상태 DB에 기록된 위치를 base 폴더 기준 경로로 바꿉니다 ("pack 경로@위치" 형식 유지)."""
+    pack_path, sep, offset = location.rpartition('@')
+    path = pack_path if sep else location
+    if not os.path.isabs(path):
+        path = os.path.join(base, path)
+    return f"{path}@{offset}" if sep else path
+
+class FlatStorage:
+    """기존 방식: save_dir 한 폴더에 {index}_{번호}.{ext}로 저장"""
+    def __init__(self, directory):
+        self.directory = directory
+
+    def put(self, image, index, img_index):
+        """임시 파일을 최종 위치로 옮기고 저장 위치를 반환합니다."""
+        path = os.path.join(self.directory, f"{index}_{img_index}.{image.ext}")
+        os.replace(image.tmp_path, path)
+        return path
+
+    def close(self):
+        pass
+
+class FanoutStorage:
+    """해시 앞 4자리로 두 단계 하위 폴더(ab/cd/)를 만들어 폴더당 파일 수를 제한합니다.
+
+    파일 이름은 해시 자체이므로 같은 내용은 항상 같은 위치에 저장됩니다.
+    어느 게시글의 이미지인지는 상태 DB의 image_locations 테이블에 기록됩니다.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path_for(self, digest, ext):
+        name = digest.hex()
+        return os.path.join(self.directory, name[:2], name[2:4], f"{name}.{ext}")
+
+    def put(self, image, index, img_index):
+        path = self.path_for(image.hash, image.ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(image.tmp_path, path)
+        return path
+
+    def read(self, digest):
+        """해시로 이미지를 읽습니다. 없으면 None"""
+        for ext in ('jpg', 'png', 'gif'):
+            try:
+                with open(self.path_for(digest, ext), 'rb') as f:
+                    return f.read()
+            except FileNotFoundError:
+                continue
+        return None
+
+    def close(self):
+        pass
+
+class PackStorage:
+    """작은 이미지를 묶음(pack) 파일에 이어 쓰고, 큰 이미지는 fanout 폴더에 저장합니다.
+
+    pack-<작업자>-<번호>.pack 에는 이미지 데이터만 이어 쓰고, 같은 이름의 .idx 파일에
+    고정 길이 레코드(해시 16바이트, 위치, 길이, 파일명 32바이트)를 추가합니다.
+    작업자(호스트:프로세스)마다 따로 pack 파일을 쓰므로 여러 프로세스가 같은 폴더를 써도 됩니다.
+    이미지 하나를 읽을 때는 상태 DB(image_locations)에서 위치를 찾아 한 번만 seek 합니다.
+    DB에 없는 이미지(이전 버전에서 저장)는 .idx 파일을 하나씩 차례로 찾아봅니다.
+    """
+    record = struct.Struct("<16sQI32s")
+
+    def __init__(self, directory, fallback, store):
+        self.directory = directory
+        self.fallback = fallback
+        self.store = store
+        self.worker = f"{socket.gethostname()}-{os.getpid()}"
+        self.lock = threading.Lock()
+        self.pack = None
+        self.index_file = None
+        self.sequence = 0
+
+    def _open_next(self):
+        """새 pack 파일을 엽니다 (기존 파일 번호 다음부터)."""
+        self._close()
+        os.makedirs(self.directory, exist_ok=True)
+        while True:
+            self.sequence += 1
+            base = os.path.join(self.directory, f"pack-{self.worker}-{self.sequence:05d}")
+            if not os.path.exists(f"{base}.pack"):
+                break
+        self.pack = open(f"{base}.pack", 'ab')
+        self.index_file = open(f"{base}.idx", 'ab')
+
+    def _close(self):
+        if self.pack:
+            self.pack.close()
+            self.index_file.close()
+            self.pack = self.index_file = None
+
+    def put(self, image, index, img_index):
+        if image.size > pack_max_image_size:
+            return self.fallback.put(image, index, img_index)
+        
+        with open(image.tmp_path, 'rb') as f:
+            data = f.read()
+        name = f"{index}_{img_index}.{image.ext}"
+        with self.lock:
+            if self.pack is None or self.pack.tell() + len(data) > pack_file_max_size:
+                self._open_next()
+            offset = self.pack.tell()
+            self.pack.write(data)
+            self.pack.flush()
+            # 데이터가 기록된 뒤에 인덱스를 추가 (중간에 끊기면 인덱스 없는 데이터만 남음)
+            self.index_file.write(self.record.pack(image.hash, offset, len(data), name.encode('utf-8')[:32]))
+            self.index_file.flush()
+            pack_path = self.pack.name
+        remove_file(image.tmp_path)
+        return f"{pack_path}@{offset}"
+
+    def _scan_indexes(self, digest):
+        """.idx 파일을 하나씩 읽어 해시를 찾습니다. (pack 경로, 위치, 길이) 또는 None"""
+        if not os.path.isdir(self.directory):
+            return None
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith('.idx'):
+                continue
+            with open(os.path.join(self.directory, filename), 'rb') as f:
+                data = f.read()
+            usable = len(data) - len(data) % self.record.size
+            for found, offset, length, _ in self.record.iter_unpack(data[:usable]):
+                if found == digest:
+                    return os.path.join(self.directory, filename[:-4] + '.pack'), offset, length
+        return None
+
+    def read(self, digest):
+        """해시로 이미지를 읽습니다. 없으면 None"""
+        row = self.store.get_location(digest)
+        if row is None:
+            location = self._scan_indexes(digest)
+        else:
+            # pack에 저장된 이미지의 위치는 "pack 경로@위치" 형식
+            pack_path, _, offset = row[0].rpartition('@')
+            location = (pack_path, int(offset), row[1]) if pack_path else None
+        if location is None:
+            return self.fallback.read(digest)
+        pack_path, offset, length = location
+        with open(pack_path, 'rb') as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+image_storage = None
+image_storage_lock = threading.Lock()
+
+def get_image_storage():
+    """storage_backend 설정에 맞는 저장소를 만듭니다 (처음 한 번만)."""
+    global image_storage
+    with image_storage_lock:
+        if image_storage is None:
+            if storage_backend == "fanout":
+                image_storage = FanoutStorage(save_dir)
+            elif storage_backend == "pack":
+                image_storage = PackStorage(pack_dir, FanoutStorage(save_dir), state_store)
+            else:
+                image_storage = FlatStorage(save_dir)
+        return image_storage
+
+def fetch_image(img_url):
+    """이미지를 스트리밍으로 임시 파일에 받으면서 해시를 계산합니다.
+
+    본문을 읽기 전에 헤더(Content-Type, Content-Length)로 걸러내고, 조각 단위로
+    해시와 임시 파일에 기록하므로 이미지 크기와 관계없이 메모리 사용량이 일정합니다.
+    저장할 필요가 없으면 None을 반환합니다.
+    """
+    # 이미지 다운로드 (이전에 받은 적 있으면 조건부 요청)
+    started = perf_counter()
+    entry = load_cache_entry(img_url) if use_http_cache else None
+    with http_get(img_url, timeout=10, cache_entry=entry, stream=True) as img_response:
+        if img_response.status_code == 304:
+            if entry.get("rejected"):
+                # 이전 실행에서 너무 작아 버린 이미지 (중복이나 304 통계에 넣지 않음)
+                print(f"✗ 너무 작은 이미지 무시 (이전 실행에서 확인됨): {img_url}")
+                add_stat("small_images_skipped")
+                return None
+            print(f"✗ 변경 없는 이미지 무시 (이전 실행에서 처리됨): {img_url}")
+            add_stat("not_modified")
+            add_stat("duplicates_skipped")
+            return None
         if img_response.status_code != 200:
             print(f"✗ 이미지 다운로드 실패 (상태코드: {img_response.status_code}): {img_url}")
-            return False
+            return None
             
         # Content-Type 확인
         content_type = img_response.headers.get('Content-Type', '')
         if 'image' not in content_type:
             print(f"✗ 이미지가 아닌 컨텐츠: {content_type}")
-            return False
-            
-        # 이미지 데이터
-        img_data = img_response.content
+            return None
         
-        # 파일 크기가 너무 작으면 의미 있는 이미지가 아닐 수 있음
-        if len(img_data) < 5000:  # 5KB 미만
-            print(f"✗ 너무 작은 이미지 무시: {len(img_data)} bytes")
-            return False
-            
-        # 이미지 해시 계산 (중복 확인용)
-        img_hash = get_image_hash(img_data)
+        # 파일 크기가 너무 작으면 의미 있는 이미지가 아닐 수 있음 (본문을 받기 전에 판단)
+        content_length = img_response.headers.get('Content-Length')
+        if content_length and content_length.isdigit() and int(content_length) < min_image_size:
+            print(f"✗ 너무 작은 이미지 무시: {content_length} bytes")
+            add_stat("small_images_skipped")
+            store_cache_entry(img_url, img_response, rejected=True)
+            return None
         
-        # 이미 다운로드한 이미지인지 확인
-        if img_hash in image_hashes:
-            print(f"✗ 중복 이미지 무시: {img_url}")
-            stats["duplicates_skipped"] += 1
-            return False
+        # 임시 파일에 조각 단위로 쓰면서 해시 계산
+        hasher = hashlib.blake2b(digest_size=16)
+        size = 0
+        hash_time = write_time = 0.0
+        tmp = tempfile.NamedTemporaryFile(dir=save_dir, suffix='.part', delete=False)
+        try:
+            with tmp:
+                for chunk in img_response.iter_content(chunk_size=download_chunk_size):
+                    t0 = perf_counter()
+                    hasher.update(chunk)
+                    t1 = perf_counter()
+                    tmp.write(chunk)
+                    write_time += perf_counter() - t1
+                    hash_time += t1 - t0
+                    size += len(chunk)
+        except Exception:
+            remove_file(tmp.name)
+            raise
         
-        # 이미지 해시 저장
-        image_hashes.add(img_hash)
+        metrics.observe("image_fetch", perf_counter() - started - hash_time - write_time)
+        metrics.observe("hash", hash_time)
+        metrics.observe("write", write_time)
+        metrics.count("bytes", size)
         
-        # 확장자 결정
-        ext = 'jpg'  # 기본 확장자
-        if 'png' in content_type:
-            ext = 'png'
-        elif 'gif' in content_type:
-            ext = 'gif'
-        elif 'jpeg' in content_type or 'jpg' in content_type:
-            ext = 'jpg'
-            
-        # 파일명 생성 및 저장
-        filename = f"{index}_{img_index}.{ext}"
-        filepath = os.path.join(save_dir, filename)
+        if size < min_image_size:
+            print(f"✗ 너무 작은 이미지 무시: {size} bytes")
+            remove_file(tmp.name)
+            add_stat("small_images_skipped")
+            store_cache_entry(img_url, img_response, rejected=True)
+            return None
         
-        with open(filepath, 'wb') as f:
-            f.write(img_data)
-            
-        print(f"✓ 이미지 저장 완료: {filename} ({len(img_data)/1024:.1f} KB)")
-        stats["unique_images_downloaded"] += 1
-        return True
+        return DownloadedImage(img_url, tmp.name, hasher.digest(), image_extension(content_type), size, img_response)
+
+def save_image(image, index, img_index):
+    """중복이 아니면 임시 파일을 이미지 저장소로 옮깁니다. 저장했으면 True"""
+    # 이미 다운로드한 이미지인지 확인 (이전 실행에서 받은 이미지 포함)
+    if not state_store.add_hash(image.hash):
+        print(f"✗ 중복 이미지 무시: {image.url}")
+        add_stat("duplicates_skipped")
+        remove_file(image.tmp_path)
+        store_cache_entry(image.url, image.response)
+        remember_image_url(image.url, image.hash)
+        return False
+    
+    # 재인코딩/크기 변경된 같은 이미지인지 확인
+    if use_perceptual_hash and is_near_duplicate(image):
+        print(f"✗ 거의 같은 이미지 무시: {image.url}")
+        add_stat("near_duplicates_skipped")
+        remove_file(image.tmp_path)
+        store_cache_entry(image.url, image.response)
+        remember_image_url(image.url, image.hash)
+        return False
+    
+    # 저장소에 기록 (해시가 확인된 뒤에만 임시 파일을 옮김)
+    try:
+        location = get_image_storage().put(image, index, img_index)
+    except Exception:
+        state_store.remove_hash(image.hash)
+        remove_file(image.tmp_path)
+        raise
+    state_store.add_location(image.hash, location, image.size, index, img_index)
+    store_cache_entry(image.url, image.response)
+    remember_image_url(image.url, image.hash)
+    
+    print(f"✓ 이미지 저장 완료: {location} ({image.size/1024:.1f} KB)")
+    add_stat("unique_images_downloaded")
+    metrics.count("images_saved")
+    return True
+
+def download_image(img_url, index, img_index):
+    """이미지를 다운로드하고 중복 체크를 수행합니다."""
+    global duplicate_count
+    
+    image = None
+    try:
+        # URL 검증
+        if not img_url or should_ignore_image(img_url):
+            return False
+        
+        # 이미 받은 URL이면 네트워크 요청 없이 중복 처리
+        if skip_known_url(img_url):
+            return False
+        
+        image = fetch_image(img_url)
+        if image is None:
+            return False
+        return save_image(image, index, img_index)
         
     except Exception as e:
         print(f"✗ 이미지 다운로드 중 오류: {e}")
-        stats["errors"] += 1
+        add_stat("errors")
         return False
+    finally:
+        # 저장소로 옮겨졌으면 이미 없는 파일 (어떤 오류로 끝나도 .part 파일을 남기지 않음)
+        if image is not None:
+            remove_file(image.tmp_path)
+
+def get_board(url):
+    """URL의 게시판 id(bbs_id)를 반환합니다."""
+    return parse_qs(urlparse(url).query).get('bbs_id', [''])[0]
+
+def load_selector_cache():
+    """게시판별로 마지막에 성공한 본문 선택자를 읽어옵니다."""
+    try:
+        with open(selector_cache_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+selector_cache = load_selector_cache()
+selector_cache_lock = threading.Lock()
+
+def element_selector(element):
+    """본문 요소를 다시 찾을 수 있는 선택자 정보를 만듭니다."""
+    return {
+        "name": element.name,
+        "id": element.get('id'),
+        "class": ' '.join(element.get('class', []))
+    }
+
+def find_by_selector(soup, selector):
+    """캐시된 선택자로 본문 요소를 찾습니다."""
+    if selector.get("id"):
+        return soup.find(selector["name"], id=selector["id"])
+    if selector.get("class"):
+        return soup.find(selector["name"], class_=selector["class"])
+    return None
 
-def find_content_area(soup):
-    """게시글 본문 영역을 찾습니다."""
+def remember_selector(board, element):
+    """이번에 성공한 선택자를 게시판별 캐시에 저장합니다."""
+    selector = element_selector(element)
+    if not selector["id"] and not selector["class"]:
+        return
+    with selector_cache_lock:
+        if selector_cache.get(board) == selector:
+            return
+        selector_cache[board] = selector
+        if not save_selector_cache:
+            return
+        try:
+            write_atomic(selector_cache_file, json.dumps(selector_cache, ensure_ascii=False, indent=2), mode='w', encoding='utf-8')
+        except OSError as e:
+            print(f"선택자 캐시 저장 중 오류: {e}")
+
+def find_content_area(soup, board=None, measures=None):
+    """게시글 본문 영역을 찾습니다. board가 주어지면 게시판별로 성공한 선택자를 먼저 시도합니다."""
+    if board is not None:
+        selector = selector_cache.get(board)
+        if selector:
+            content = find_by_selector(soup, selector)
+            if content:
+                return content
+    
+    content = search_content_area(soup, measures)
+    if content and board is not None:
+        remember_selector(board, content)
+    return content
+
+def search_content_area(soup, measures=None):
+    """여러 규칙으로 게시글 본문 영역을 찾습니다.
+
+    규칙의 우선순위는 그대로 두고, 모든 규칙의 후보를 한 번의 순회로 모은 뒤 고릅니다.
+    """
     # 일반적인 본문 영역 클래스
     common_content_classes = [
         'view_content', 'article_content', 'content', 'board_content',
         'post_content', 'entry_content', 'article-content', 'post-content'
     ]
+    id_patterns = [(id_name, re.compile(id_name, re.I)) for id_name in ['content', 'article', 'post']]
+    
+    # 텍스트 길이/이미지 수는 한 번만 계산해서 재사용
+    if measures is None:
+        measures = measure_tree(soup)
+    
+    by_class = {}        # 1. 직접적인 클래스명으로 찾은 요소
+    partial_match = None # 2. 클래스명에 'content'/'article'/'post'가 포함된 요소
+    by_id = {}           # 3. id에 'content'/'article'/'post'가 포함된 요소
+    longest_div = None   # 4. 가장 텍스트가 많은 div
+    longest_len = -1
+    
+    for element in soup.find_all(True):
+        name = element.name
+        classes = element.get('class')
+        if classes and name in ('div', 'article', 'section'):
+            for class_name in classes + [' '.join(classes)]:
+                by_class.setdefault(class_name, element)
+            if partial_match is None:
+                class_names = ' '.join(classes).lower()
+                if 'content' in class_names or 'article' in class_names or 'post' in class_names:
+                    # 텍스트 길이가 충분히 길거나 이미지가 포함된 경우만
+                    if text_length(measures, element) > 200 or image_count(measures, element) > 0:
+                        partial_match = element
+        
+        element_id = element.get('id')
+        if element_id:
+            for id_name, pattern in id_patterns:
+                if id_name not in by_id and pattern.search(element_id):
+                    by_id[id_name] = element
+        
+        if name == 'div':
+            length = text_length(measures, element)
+            if length > longest_len:
+                longest_div, longest_len = element, length
     
-    # 1. 직접적인 클래스명으로 찾기
     for class_name in common_content_classes:
-        content = soup.find(['div', 'article', 'section'], class_=class_name)
-        if content:
-            return content
-    
-    # 2. 클래스명에 'content' 또는 'article'이 포함된 요소 찾기
-    for element in soup.find_all(['div', 'article', 'section'], class_=True):
-        class_names = ' '.join(element.get('class')).lower()
-        if 'content' in class_names or 'article' in class_names or 'post' in class_names:
-            # 텍스트 길이가 충분히 길거나 이미지가 포함된 경우만
-            if len(element.text.strip()) > 200 or len(element.find_all('img')) > 0:
-                return element
-    
-    # 3. id에 'content' 또는 'article'이 포함된 요소 찾기
-    for id_name in ['content', 'article', 'post']:
-        content = soup.find(id=re.compile(id_name, re.I))
-        if content:
-            return content
-    
-    # 4. 가장 텍스트가 많은 div 찾기 (마지막 수단)
-    divs = soup.find_all('div')
-    if divs:
-        # 텍스트 길이 기준으로 정렬
-        divs_by_text = sorted(divs, key=lambda x: len(x.text.strip()), reverse=True)
-        if divs_by_text and len(divs_by_text[0].text.strip()) > 200:
-            return divs_by_text[0]
+        if class_name in by_class:
+            return by_class[class_name]
+    
+    if partial_match is not None:
+        return partial_match
+    
+    for id_name, _ in id_patterns:
+        if id_name in by_id:
+            return by_id[id_name]
+    
+    # 마지막 수단
+    if longest_div is not None and longest_len > 200:
+        return longest_div
     
     return None
 
-def process_article(index):
-    """게시글 처리 함수"""
+def parse_article(index, url, html):
+    """게시글 HTML에서 본문 이미지 URL을 골라냅니다. (발견된 이미지 수, 본문 이미지 URL 목록)을 반환합니다.
+
+    네트워크나 공유 상태를 쓰지 않으므로 별도 프로세스에서 실행할 수 있습니다.
+    """
+    # HTML 파싱
+    with metrics.timer("parse"):
+        soup = BeautifulSoup(html, get_parser())
+    
+    # 디버깅 정보 저장 (트리 측정 결과는 본문 영역 찾기에도 재사용)
+    measures = None
+    if save_debug:
+        measures = measure_tree(soup)
+        save_debug_info(index, soup, measures)
+    
+    # 게시글 본문 영역 찾기 (게시판별로 성공한 선택자 우선)
+    with metrics.timer("content_area"):
+        content_area = find_content_area(soup, get_board(url), measures)
+    
+    if content_area:
+        print(f"✓ 본문 영역 식별: {content_area.name} (클래스: {content_area.get('class', '없음')})")
+        images = content_area.find_all('img')
+    else:
+        print("⚠️ 본문 영역 식별 실패, 전체 HTML에서 이미지 검색")
+        images = soup.find_all('img')
+    
+    # 이미지 수 기록
+    print(f"발견된 이미지: {len(images)}개")
+    
+    # 본문 내용에 해당하는 이미지만 필터링
+    content_images = []
+    for img in images:
+        # src 또는 data-src 속성 확인
+        img_url = img.get('src') or img.get('data-src')
+        if not img_url:
+            continue
+            
+        # URL 정규화
+        img_url = normalize_url(img_url, url)
+        if not img_url:
+            continue
+            
+        # 유효한 콘텐츠 이미지인지 확인
+        if is_valid_content_image(img):
+            content_images.append(img_url)
+    
+    if images:
+        print(f"콘텐츠 이미지로 식별됨: {len(content_images)}개")
+    return len(images), content_images
+
+# 파싱 프로세스는 spawn 방식으로 시작합니다. fork 방식은 첫 작업을 넘길 때 프로세스를 만드는데,
+# 그때 다른 스레드가 잡고 있던 잠금(metrics.lock, stats_lock 등)이 잠긴 채로 복사되어 자식이 멈출 수 있습니다.
+parse_process_context = multiprocessing.get_context("spawn")
+
+def init_parse_worker():
+    """파싱 프로세스 시작 시 지표를 비웁니다 (모듈을 불러오면서 기록된 값이 집계되지 않도록)."""
+    metrics.drain()
+
+def parse_article_in_worker(index, url, html):
+    """프로세스 풀용 parse_article: 결과와 함께 이 프로세스에서 기록된 지표를 돌려줍니다."""
+    return parse_article(index, url, html), metrics.drain()
+
+def collect_content_images(index):
+    """게시글 페이지를 가져와 본문 이미지 URL 목록을 반환합니다. 실패하면 None을 반환합니다."""
     url = f"{base_url}{index}"
-    stats["total_articles"] += 1
+    add_stat("total_articles")
+    metrics.count("articles")
     
     try:
         print(f"\n[{index}/{end}] 처리 중: {url}")
         
         # 웹 페이지 요청
-        response = requests.get(url, headers=headers, timeout=15)
-        if response.status_code != 200:
-            print(f"✗ 페이지 접근 실패 (상태코드: {response.status_code})")
-            return 0
-            
-        # HTML 파싱
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 디버깅 정보 저장
-        save_debug_info(index, soup)
+        html = fetch_page(url)
+        if html is None:
+            return None
         
-        # 게시글 본문 영역 찾기
-        content_area = find_content_area(soup)
-        
-        if content_area:
-            print(f"✓ 본문 영역 식별: {content_area.name} (클래스: {content_area.get('class', '없음')})")
-            images = content_area.find_all('img')
-        else:
-            print("⚠️ 본문 영역 식별 실패, 전체 HTML에서 이미지 검색")
-            images = soup.find_all('img')
-        
-        # 이미지 수 기록
-        print(f"발견된 이미지: {len(images)}개")
-        stats["total_images_found"] += len(images)
-        
-        if not images:
-            return 0
-        
-        # 본문 내용에 해당하는 이미지만 필터링
-        content_images = []
-        for img in images:
-            # src 또는 data-src 속성 확인
-            img_url = img.get('src') or img.get('data-src')
-            if not img_url:
-                continue
-                
-            # URL 정규화
-            img_url = normalize_url(img_url, url)
-            if not img_url:
-                continue
-                
-            # 유효한 콘텐츠 이미지인지 확인
-            if is_valid_content_image(img):
-                content_images.append((img, img_url))
-        
-        print(f"콘텐츠 이미지로 식별됨: {len(content_images)}개")
-        
-        # 이미지 다운로드
-        downloaded = 0
-        for i, (img, img_url) in enumerate(content_images):
-            success = download_image(img_url, index, i)
-            if success:
-                downloaded += 1
-                
-        if downloaded > 0:
-            stats["articles_with_images"] += 1
-            print(f"✓ 게시글 {index}에서 {downloaded}개 이미지 다운로드 완료")
-            
-        return downloaded
+        found, content_images = parse_article(index, url, html)
+        add_stat("total_images_found", found)
+        return content_images
             
     except Exception as e:
         print(f"✗ 게시글 {index} 처리 중 오류 발생: {e}")
-        stats["errors"] += 1
+        add_stat("errors")
+        return None
+
+def finish_article(index, downloaded):
+    """게시글 하나의 다운로드 결과를 기록합니다."""
+    if downloaded > 0:
+        add_stat("articles_with_images")
+        print(f"✓ 게시글 {index}에서 {downloaded}개 이미지 다운로드 완료")
+
+def process_article(index):
+    """게시글 처리 함수"""
+    content_images = collect_content_images(index)
+    if not content_images:
+        return 0
+    
+    # 이미지 다운로드
+    downloaded = 0
+    for i, img_url in enumerate(content_images):
+        success = download_image(img_url, index, i)
+        if success:
+            downloaded += 1
+    
+    finish_article(index, downloaded)
+    return downloaded
+
+async def process_article_async(index, image_semaphore):
+    """게시글 처리 함수 (이미지를 동시에 다운로드)"""
+    content_images = await asyncio.to_thread(collect_content_images, index)
+    if not content_images:
         return 0
+    
+    async def fetch(i, img_url):
+        async with image_semaphore:
+            return await asyncio.to_thread(download_image, img_url, index, i)
+    
+    results = await asyncio.gather(*(fetch(i, img_url) for i, img_url in enumerate(content_images)))
+    downloaded = sum(1 for success in results if success)
+    
+    finish_article(index, downloaded)
+    return downloaded
+
+def print_progress():
+    """중간 결과를 출력합니다."""
+    print("\n--- 현재까지 스크래핑 현황 ---")
+    print(f"처리된 게시글: {stats['total_articles']}개")
+    print(f"이미지 있는 게시글: {stats['articles_with_images']}개")
+    print(f"발견된 총 이미지: {stats['total_images_found']}개")
+    print(f"다운로드된 고유 이미지: {stats['unique_images_downloaded']}개")
+    print(f"중복으로 건너뛴 이미지: {stats['duplicates_skipped']}개")
+    print(f"거의 같은 이미지로 건너뛴 이미지: {stats['near_duplicates_skipped']}개")
+    print(f"너무 작아 건너뛴 이미지: {stats['small_images_skipped']}개")
+    print(f"변경 없음(304) 응답: {stats['not_modified']}회")
+    print(f"오류 발생: {stats['errors']}회")
+    print(f"429/5xx 응답: {stats['throttled']}회")
+    print(describe_host_controls())
+    print(describe_filter_cache())
+    print(metrics.describe())
+    print("-----------------------")
+
+def print_summary(totals=stats):
+    """최종 결과를 출력합니다."""
+    print("\n==== 스크래핑 완료 ====")
+    print(f"처리된 게시글: {totals['total_articles']}개")
+    print(f"이미지 있는 게시글: {totals['articles_with_images']}개")
+    print(f"발견된 총 이미지: {totals['total_images_found']}개")
+    print(f"다운로드된 고유 이미지: {totals['unique_images_downloaded']}개")
+    print(f"중복으로 건너뛴 이미지: {totals['duplicates_skipped']}개")
+    print(f"거의 같은 이미지로 건너뛴 이미지: {totals['near_duplicates_skipped']}개")
+    print(f"너무 작아 건너뛴 이미지: {totals.get('small_images_skipped', 0)}개")
+    print(f"이미지 저장 폴더: {os.path.abspath(save_dir)}")
+    print(f"디버그 로그 폴더: {os.path.abspath(log_dir)}")
+
+def crawl_sequential(indices, progress):
+    """게시글을 하나씩 순서대로 처리합니다."""
+    for count, index in enumerate(indices, 1):
+        process_article(index)
+        progress.mark_done(index)
+        
+        # 중간 결과 출력 (10개 게시글마다)
+        if count % 10 == 0 or count == len(indices):
+            print_progress()
+
+async def crawl_async(indices, progress):
+    """여러 게시글을 동시에 처리합니다. 요청 속도는 호스트별 토큰 버킷이 제한합니다."""
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=max_concurrent_articles + max_concurrent_images))
+    image_semaphore = asyncio.Semaphore(max_concurrent_images)
+    pending = iter(indices)
+    done = 0
+    
+    async def worker():
+        nonlocal done
+        for index in pending:
+            await process_article_async(index, image_semaphore)
+            progress.mark_done(index)
+            done += 1
+            
+            # 중간 결과 출력 (10개 게시글마다)
+            if done % 10 == 0:
+                print_progress()
+    
+    await asyncio.gather(*(worker() for _ in range(max_concurrent_articles)))
+    if done % 10 != 0:
+        print_progress()
+
+def start_workers(count, target, *args):
+    """같은 작업을 하는 스레드 count개를 시작합니다."""
+    threads = [threading.Thread(target=target, args=args, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def close_stage(threads, next_queue, next_count):
+    """앞 단계 스레드가 모두 끝나면 다음 단계 작업자 수만큼 종료 신호(None)를 보냅니다."""
+    for thread in threads:
+        thread.join()
+    for _ in range(next_count):
+        next_queue.put(None)
+
+def pipeline_fetch_worker(index_queue, html_queue, write_queue):
+    """1단계(I/O): 게시글 HTML을 가져옵니다."""
+    while True:
+        index = index_queue.get()
+        if index is None:
+            return
+        url = f"{base_url}{index}"
+        add_stat("total_articles")
+        metrics.count("articles")
+        try:
+            print(f"\n[{index}/{end}] 처리 중: {url}")
+            html = fetch_page(url)
+        except Exception as e:
+            print(f"✗ 게시글 {index} 처리 중 오류 발생: {e}")
+            add_stat("errors")
+            html = None
+        if html is None:
+            write_queue.put(("article", index, 0))
+        else:
+            html_queue.put((index, url, html))
+
+def pipeline_parse_worker(parse_pool, html_queue, image_queue, write_queue):
+    """2단계(CPU): 프로세스 풀에서 파싱과 본문 이미지 필터링을 수행합니다."""
+    while True:
+        item = html_queue.get()
+        if item is None:
+            return
+        index, url, html = item
+        try:
+            (found, content_images), worker_metrics = parse_pool.submit(parse_article_in_worker, index, url, html).result()
+            metrics.merge(worker_metrics)
+        except Exception as e:
+            print(f"✗ 게시글 {index} 처리 중 오류 발생: {e}")
+            add_stat("errors")
+            found, content_images = 0, []
+        add_stat("total_images_found", found)
+        # 기록 단계가 이미지 결과보다 게시글 정보를 먼저 받도록 먼저 넣음
+        write_queue.put(("article", index, len(content_images)))
+        for i, img_url in enumerate(content_images):
+            image_queue.put((index, i, img_url))
+
+def pipeline_download_worker(image_queue, write_queue):
+    """3단계(I/O): 이미지를 임시 파일로 받고 해시를 계산합니다."""
+    while True:
+        item = image_queue.get()
+        if item is None:
+            return
+        index, img_index, img_url = item
+        image = None
+        try:
+            if img_url and not should_ignore_image(img_url) and not skip_known_url(img_url):
+                image = fetch_image(img_url)
+        except Exception as e:
+            print(f"✗ 이미지 다운로드 중 오류: {e}")
+            add_stat("errors")
+        write_queue.put(("image", index, (img_index, image)))
+
+def pipeline_writer(write_queue, progress):
+    """4단계: 디스크와 중복 저장소는 이 스레드 하나만 사용합니다."""
+    # 게시글별 [남은 이미지 수, 저장한 이미지 수]
+    articles = {}
+    done = 0
+    
+    def complete(index):
+        nonlocal done
+        finish_article(index, articles.pop(index)[1])
+        progress.mark_done(index)
+        done += 1
+        # 중간 결과 출력 (10개 게시글마다)
+        if done % 10 == 0:
+            print_progress()
+    
+    while True:
+        item = write_queue.get()
+        if item is None:
+            break
+        kind, index, value = item
+        if kind == "article":
+            articles[index] = [value, 0]
+        else:
+            img_index, image = value
+            if image is not None:
+                try:
+                    if save_image(image, index, img_index):
+                        articles[index][1] += 1
+                except Exception as e:
+                    print(f"✗ 이미지 다운로드 중 오류: {e}")
+                    add_stat("errors")
+                finally:
+                    remove_file(image.tmp_path)
+            articles[index][0] -= 1
+        if articles[index][0] == 0:
+            complete(index)
+    
+    if done % 10 != 0:
+        print_progress()
+
+def crawl_pipeline(indices, progress):
+    """가져오기 → 파싱(프로세스 풀) → 이미지 다운로드 → 기록 단계를 크기가 제한된 대기열로 연결해 동시에 실행합니다.
+
+    대기열이 가득 차면 앞 단계가 기다리므로 느린 단계에 맞춰 전체 속도가 조절됩니다.
+    """
+    index_queue = queue.Queue(maxsize=pipeline_queue_size)
+    html_queue = queue.Queue(maxsize=pipeline_queue_size)
+    image_queue = queue.Queue(maxsize=pipeline_queue_size)
+    write_queue = queue.Queue(maxsize=pipeline_queue_size)
+    
+    with ProcessPoolExecutor(max_workers=parse_processes, mp_context=parse_process_context,
+                             initializer=init_parse_worker) as parse_pool:
+        fetchers = start_workers(max_concurrent_articles, pipeline_fetch_worker, index_queue, html_queue, write_queue)
+        parsers = start_workers(parse_processes, pipeline_parse_worker, parse_pool, html_queue, image_queue, write_queue)
+        downloaders = start_workers(max_concurrent_images, pipeline_download_worker, image_queue, write_queue)
+        writer = start_workers(1, pipeline_writer, write_queue, progress)
+        
+        for index in indices:
+            index_queue.put(index)
+        for _ in fetchers:
+            index_queue.put(None)
+        close_stage(fetchers, html_queue, len(parsers))
+        close_stage(parsers, image_queue, len(downloaders))
+        close_stage(downloaders, write_queue, 1)
+        for thread in writer:
+            thread.join()
+
+def init_offline_worker():
+    """오프라인 재처리 프로세스 시작 시 호출합니다.
+
+    바뀐 본문 찾기 규칙이 그대로 적용되도록 게시판별 선택자 캐시를 비우고, 캐시 파일과
+    디버그 파일은 실행 중인 크롤러의 것을 덮어쓰지 않도록 쓰지 않거나 offline_debug_dir에 씁니다.
+    """
+    global save_selector_cache, debug_dir
+    init_parse_worker()
+    selector_cache.clear()
+    save_selector_cache = False
+    debug_dir = offline_debug_dir
+    os.makedirs(debug_dir, exist_ok=True)
+
+def reprocess_record(index, url, path, offset, length):
+    """보관된 게시글 하나를 다시 파싱합니다 (프로세스 풀에서 실행)."""
+    html = read_archive_record(path, offset, length)
+    return parse_article_in_worker(index, url, html)
+
+def reprocess_archive():
+    """보관 파일의 게시글을 네트워크 없이 모든 코어로 다시 파싱하고, 필터와 중복 검사를 적용해 보고서를 만듭니다."""
+    archived = get_article_archive().load_index()
+    if not archived:
+        print(f"{archive_dir}에 보관된 게시글이 없습니다. archive_enabled = True로 크롤링한 뒤 다시 실행하세요.")
+        return
+    records = []
+    for index in range(start, end + 1):
+        url = f"{base_url}{index}"
+        if url in archived:
+            path, offset, length, _ = archived[url]
+            records.append((index, url, path, offset, length))
+    print(f"보관된 게시글 {len(records)}개를 다시 처리합니다 (프로세스 {parse_processes}개).")
+    
+    try:
+        with open(offline_report_file, 'r', encoding='utf-8') as f:
+            previous = json.load(f)["articles"]
+    except (OSError, ValueError, KeyError):
+        previous = {}
+    
+    articles = {}
+    seen_urls = set()
+    changed = 0
+    started = monotonic()
+    with ProcessPoolExecutor(max_workers=parse_processes, mp_context=parse_process_context,
+                             initializer=init_offline_worker) as parse_pool:
+        results = parse_pool.map(reprocess_record, *zip(*records), chunksize=16) if records else []
+        for (index, *_), ((found, content_images), worker_metrics) in zip(records, results):
+            metrics.merge(worker_metrics)
+            add_stat("total_articles")
+            add_stat("total_images_found", found)
+            
+            kept = []
+            for img_url in content_images:
+                if should_ignore_image(img_url):
+                    continue
+                if img_url in seen_urls:
+                    add_stat("duplicates_skipped")
+                    continue
+                seen_urls.add(img_url)
+                kept.append(img_url)
+            if kept:
+                add_stat("articles_with_images")
+            articles[str(index)] = kept
+            if str(index) in previous and previous[str(index)] != kept:
+                changed += 1
+    
+    elapsed = monotonic() - started
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "range": [start, end],
+        "stats": dict(stats),
+        "unique_image_urls": len(seen_urls),
+        "articles": articles
+    }
+    write_atomic(offline_report_file, json.dumps(report, ensure_ascii=False, indent=2), mode='w', encoding='utf-8')
+    
+    print("\n==== 오프라인 재처리 완료 ====")
+    print(f"처리된 게시글: {stats['total_articles']}개 ({elapsed:.1f}초)")
+    print(f"본문 이미지가 있는 게시글: {stats['articles_with_images']}개")
+    print(f"발견된 총 이미지: {stats['total_images_found']}개")
+    print(f"고유 본문 이미지 URL: {len(seen_urls)}개")
+    print(f"중복 URL로 건너뛴 이미지: {stats['duplicates_skipped']}개")
+    if previous:
+        print(f"이전 보고서와 결과가 달라진 게시글: {changed}개")
+    print(f"보고서: {os.path.abspath(offline_report_file)}")
+
+def job_key():
+    """현재 범위를 구분하는 키 (체크포인트/샤드 기록용)"""
+    return f"{base_url}{start}-{end}"
+
+def run_crawl(indices, progress):
+    """설정된 방식으로 indices의 게시글을 처리합니다."""
+    if crawl_mode == "async":
+        asyncio.run(crawl_async(indices, progress))
+    elif crawl_mode == "pipeline":
+        crawl_pipeline(indices, progress)
+    else:
+        crawl_sequential(indices, progress)
+
+def run_shards():
+    """남은 샤드가 없을 때까지 샤드를 하나씩 임대해서 처리합니다."""
+    shard_store = ShardStore(shard_db, job_key())
+    shard_store.plan(start, end, shard_size)
+    try:
+        while True:
+            shard = shard_store.claim()
+            if shard is None:
+                break
+            shard_start, shard_end, last_done = shard
+            print(f"\n샤드 {shard_start}~{shard_end} 처리 시작 (작업자: {shard_store.worker}, {last_done}까지 완료됨)")
+            progress = ProgressTracker(shard_store, shard_start, last_done + 1)
+            run_crawl(range(last_done + 1, shard_end + 1), progress)
+            shard_store.finish(shard_start)
+    finally:
+        shard_store.close()
+
+def merge_hosts(shard_store):
+    """merge_state_dbs의 상태 DB를 이 컴퓨터의 state_db로 합치고 컴퓨터 사이 중복을 샤드 DB에 기록합니다."""
+    for path in merge_state_dbs:
+        if not os.path.exists(path):
+            print(f"⚠️ 합칠 상태 DB가 없습니다: {path}")
+            continue
+        added, duplicates, removed, in_range = state_store.merge_from(path, start, end)
+        shard_store.add_cross_duplicates(in_range)
+        print(f"{path} 합침: 새 이미지 {added}개, 중복 {duplicates}개 (지운 파일 {removed}개)")
+
+def shard_worker_process():
+    """샤드 작업자 프로세스의 진입점"""
+    global metrics_json_file, metrics_prom_file
+    # 작업자마다 따로 지표 파일을 남김
+    metrics_json_file = os.path.join(log_dir, f"metrics_{os.getpid()}.json")
+    metrics_prom_file = os.path.join(log_dir, f"metrics_{os.getpid()}.prom")
+    if metrics_enabled:
+        start_metrics_exporter()
+    try:
+        run_shards()
+    finally:
+        state_store.close()
+        get_image_storage().close()
+        get_article_archive().close()
+        if metrics_enabled:
+            export_metrics()
+
+def main():
+    if offline_reprocess:
+        reprocess_archive()
+        return
+    
+    print(f"포모스 이미지 스크래핑 시작 (인덱스 {start}~{end})...")
+    print(f"저장된 이미지 해시: {state_store.hash_count()}개")
+    
+    if use_shards:
+        # 이 컴퓨터에서 작업자 프로세스 여러 개 실행 (다른 컴퓨터에서도 같은 설정으로 실행 가능)
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=shard_worker_process) for _ in range(shard_local_workers)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        
+        shard_store = ShardStore(shard_db, job_key())
+        try:
+            merge_hosts(shard_store)
+            totals, finished, total = shard_store.summary()
+        finally:
+            shard_store.close()
+            state_store.close()
+            get_image_storage().close()
+            get_article_archive().close()
+        print(f"\n완료된 샤드: {finished}/{total}개")
+        if finished < total:
+            print("⚠️ 다른 작업자가 아직 처리 중인 샤드가 있습니다. 아래 결과는 지금까지의 합계입니다.")
+        if not merge_state_dbs:
+            print("여러 컴퓨터에서 실행했다면 merge_state_dbs로 합치기 전까지 고유 이미지 수는 컴퓨터 사이 중복을 포함한 최댓값입니다.")
+        print_summary(totals)
+        return
+    
+    # 이전 실행이 중단된 지점부터 재개
+    checkpoint_key = job_key()
+    first = start
+    last_done = state_store.get_checkpoint(checkpoint_key) if resume else None
+    if last_done is not None and last_done >= start:
+        first = last_done + 1
+        print(f"이전 실행 체크포인트 발견: {last_done}까지 완료, {first}부터 재개합니다.")
+    
+    progress = ProgressTracker(state_store, checkpoint_key, first)
+    if metrics_enabled:
+        start_metrics_exporter()
+    try:
+        run_crawl(range(first, end + 1), progress)
+    finally:
+        state_store.close()
+        get_image_storage().close()
+        get_article_archive().close()
+        if metrics_enabled:
+            export_metrics()
+    
+    print_summary()
 
-# 메인 실행 코드
-print(f"포모스 이미지 스크래핑 시작 (인덱스 {start}~{end})...")
-
-for index in range(start, end + 1):
-    process_article(index)
-    # 과도한 요청 방지
-    sleep(1)
-    
-    # 중간 결과 출력 (10개 게시글마다)
-    if (index - start + 1) % 10 == 0 or index == end:
-        print("\n--- 현재까지 스크래핑 현황 ---")
-        print(f"처리된 게시글: {stats['total_articles']}개")
-        print(f"이미지 있는 게시글: {stats['articles_with_images']}개")
-        print(f"발견된 총 이미지: {stats['total_images_found']}개")
-        print(f"다운로드된 고유 이미지: {stats['unique_images_downloaded']}개")
-        print(f"중복으로 건너뛴 이미지: {stats['duplicates_skipped']}개")
-        print(f"오류 발생: {stats['errors']}회")
-        print("-----------------------")
-
-# 최종 결과 출력
-print("\n==== 스크래핑 완료 ====")
-print(f"처리된 게시글: {stats['total_articles']}개")
-print(f"이미지 있는 게시글: {stats['articles_with_images']}개")
-print(f"발견된 총 이미지: {stats['total_images_found']}개")
-print(f"다운로드된 고유 이미지: {stats['unique_images_downloaded']}개")
-print(f"중복으로 건너뛴 이미지: {stats['duplicates_skipped']}개")
-print(f"이미지 저장 폴더: {os.path.abspath(save_dir)}")
-print(f"디버그 로그 폴더: {os.path.abspath(log_dir)}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""a.py(포모스 이미지 스크래퍼) 오프라인 벤치마크
+
+1. 기록: 실제 사이트에서 게시글 HTML과 이미지를 한 번만 받아 fixture 폴더에 저장
+   python a_bench.py record --start 1791000 --end 1791050
+2. 재생 서버만 실행 (직접 a.py를 붙여 보고 싶을 때)
+   python a_bench.py serve --latency 0.05 --error-rate 0.01 --rate-429 0.02
+3. 벤치마크: 재생 서버를 띄우고 크롤링 방식별로 a.py를 실행해 결과를 JSON으로 저장
+   python a_bench.py run --modes sequential async pipeline --latency 0.05
+4. 두 결과 비교
+   python a_bench.py compare bench_results/old.json bench_results/new.json
+"""
+import argparse
+import hashlib
+import http.server
+import json
+import os
+import random
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urljoin, urlparse, parse_qs
+
+try:
+    import resource  # Windows에는 없음
+except ImportError:
+    resource = None
+
+fixture_dir = "bench_fixtures"
+results_dir = "bench_results"
+live_base_url = "https://www.fomos.kr/talk/article_view?bbs_id=5&indexno="
+article_path = "/talk/article_view"
+
+def record(args):
+    """실제 사이트의 게시글과 이미지를 fixture 폴더에 저장합니다.
+
+    HTML 안의 이미지 주소는 재생 서버의 /img/<sha1>/<원래 경로> 로 바꿔 저장합니다.
+    원래 경로와 쿼리를 남겨 두므로 image_filter_rules.json의 URL 키워드(banner, logo 등)가
+    실제 사이트에서와 같이 적용됩니다 (호스트 이름 규칙은 적용되지 않음).
+    """
+    import requests
+    from bs4 import BeautifulSoup
+    from a import headers
+
+    pages_dir = os.path.join(args.fixtures, "pages")
+    img_dir = os.path.join(args.fixtures, "img")
+    os.makedirs(pages_dir, exist_ok=True)
+    os.makedirs(img_dir, exist_ok=True)
+
+    session = requests.Session()
+    session.headers.update(headers)
+    manifest = {"start": args.start, "end": args.end, "images": {}}
+
+    for index in range(args.start, args.end + 1):
+        url = f"{live_base_url}{index}"
+        try:
+            response = session.get(url, timeout=15)
+        except requests.RequestException as e:
+            print(f"✗ {index}: {e}")
+            continue
+        if response.status_code != 200:
+            print(f"✗ {index}: 상태코드 {response.status_code}")
+            continue
+
+        html = response.text
+        soup = BeautifulSoup(html, 'html.parser')
+        replaced = {}
+        for img in soup.find_all('img'):
+            for attr in ('src', 'data-src'):
+                src = img.get(attr)
+                if not src or src in replaced or src.startswith('javascript:'):
+                    continue
+                img_url = urljoin(url, src)
+                name = hashlib.sha1(img_url.encode('utf-8')).hexdigest()
+                if name not in manifest["images"]:
+                    try:
+                        img_response = session.get(img_url, timeout=10)
+                    except requests.RequestException:
+                        continue
+                    with open(os.path.join(img_dir, name), 'wb') as f:
+                        f.write(img_response.content)
+                    manifest["images"][name] = {
+                        "url": img_url,
+                        "status": img_response.status_code,
+                        "content_type": img_response.headers.get('Content-Type', '')
+                    }
+                original = urlparse(img_url)
+                local = f"/img/{name}{original.path or '/'}"
+                if original.query:
+                    local += f"?{original.query}"
+                replaced[src] = local
+
+        # 원본 HTML은 그대로 두고 이미지 주소만 바꿔서 파서가 보는 구조를 유지
+        for src, local in replaced.items():
+            html = html.replace(f'"{src}"', f'"{local}"').replace(f"'{src}'", f"'{local}'")
+        with open(os.path.join(pages_dir, f"{index}.html"), 'w', encoding='utf-8') as f:
+            f.write(html)
+        print(f"✓ {index}: 이미지 {len(replaced)}개")
+        time.sleep(args.delay)
+
+    with open(os.path.join(args.fixtures, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"기록 완료: 게시글 {args.end - args.start + 1}개, 이미지 {len(manifest['images'])}개")
+
+class ReplayHandler(http.server.BaseHTTPRequestHandler):
+    """기록된 게시글/이미지를 돌려주는 요청 처리기 (지연, 오류, 429 흉내)"""
+    protocol_version = "HTTP/1.1"
+    fixtures = fixture_dir
+    manifest = {}
+    latency = 0.0
+    error_rate = 0.0
+    rate_429 = 0.0
+    retry_after = 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency * random.uniform(0.5, 1.5))
+
+        roll = random.random()
+        if roll < self.rate_429:
+            self.send_response(429)
+            self.send_header('Retry-After', str(self.retry_after))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if roll < self.rate_429 + self.error_rate:
+            self.send_body(500, b"error", 'text/plain')
+            return
+
+        parsed = urlparse(self.path)
+        if parsed.path == article_path:
+            index = parse_qs(parsed.query).get('indexno', [''])[0]
+            path = os.path.join(self.fixtures, "pages", f"{index}.html")
+            content_type = 'text/html; charset=utf-8'
+            status = 200
+        elif parsed.path.startswith('/img/'):
+            # /img/<sha1>/<원래 경로> (이전 형식 /img/<sha1> 도 지원)
+            name = parsed.path[len('/img/'):].split('/')[0]
+            info = self.manifest.get("images", {}).get(name, {})
+            path = os.path.join(self.fixtures, "img", name)
+            content_type = info.get("content_type", 'application/octet-stream')
+            status = info.get("status", 200)
+        else:
+            path = None
+
+        if not path or not os.path.exists(path):
+            self.send_body(404, b"not found", 'text/plain')
+            return
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_body(status, body, content_type, etag)
+
+class ReplayServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def handle_error(self, request, client_address):
+        # 클라이언트가 연결을 먼저 끊는 경우(429 응답 후 등)는 무시
+        if not isinstance(sys.exc_info()[1], (ConnectionError, TimeoutError)):
+            super().handle_error(request, client_address)
+
+def start_server(args, port=0):
+    """재생 서버를 백그라운드 스레드로 시작하고 서버 객체를 반환합니다."""
+    with open(os.path.join(args.fixtures, "manifest.json"), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    handler = type("Handler", (ReplayHandler,), {
+        "fixtures": os.path.abspath(args.fixtures),
+        "manifest": manifest,
+        "latency": args.latency,
+        "error_rate": args.error_rate,
+        "rate_429": args.rate_429
+    })
+    server = ReplayServer(('127.0.0.1', port), handler)
+    server.manifest = manifest
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def serve(args):
+    server = start_server(args, args.port)
+    host, port = server.server_address
+    print(f"재생 서버 실행 중: http://{host}:{port}{article_path}?bbs_id=5&indexno=")
+    print("Ctrl + C로 종료")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+def peak_rss_kb():
+    """(이 프로세스의 최대 메모리, 종료된 자식 프로세스 중 가장 큰 최대 메모리) KB. 측정할 수 없으면 (None, None)
+
+    RUSAGE_CHILDREN은 종료되어 회수된 자식만 포함하고 합계가 아닌 최댓값이므로,
+    파싱 프로세스 여러 개를 합친 전체 메모리 사용량이 아닙니다.
+    """
+    if resource is None:
+        return None, None
+    scale = 1024 if sys.platform == "darwin" else 1  # macOS는 바이트 단위
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale
+    return own, children or None
+
+def run_one(args):
+    """빈 작업 폴더에서 a.py를 한 번 실행하고 결과를 JSON 한 줄로 출력합니다."""
+    workdir = tempfile.mkdtemp(prefix="fomos_bench_")
+    os.chdir(workdir)  # a.py는 현재 폴더에 상태/이미지를 저장하므로 매번 새 폴더 사용
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    import a
+    a.base_url = args.base_url
+    a.start = args.start
+    a.end = args.end
+    a.crawl_mode = args.mode
+    a.requests_per_second = args.rps
+    a.burst_size = max(1, int(args.rps))
+    a.metrics_enabled = False
+
+    times_before = os.times()
+    started = time.perf_counter()
+    with open(os.devnull, 'w', encoding='utf-8') as devnull:
+        stdout = sys.stdout
+        sys.stdout = devnull
+        try:
+            a.main()
+        finally:
+            sys.stdout = stdout
+    wall = time.perf_counter() - started
+    times_after = os.times()
+
+    cpu = sum(after - before for after, before in zip(times_after[:4], times_before[:4]))
+    own_rss, child_rss = peak_rss_kb()
+    images = a.stats["total_images_found"]
+    result = {
+        "mode": args.mode,
+        "articles": a.stats["total_articles"],
+        "images_found": images,
+        "images_saved": a.stats["unique_images_downloaded"],
+        "errors": a.stats["errors"],
+        "wall_seconds": wall,
+        "articles_per_second": a.stats["total_articles"] / wall,
+        "images_per_second": images / wall,
+        "cpu_seconds": cpu,
+        "peak_rss_kb": own_rss,
+        "child_peak_rss_kb": child_rss,
+        "stats": a.stats
+    }
+    print(json.dumps(result))
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run(args):
+    """재생 서버를 띄우고 방식별로 별도 프로세스에서 a.py를 실행합니다."""
+    server = start_server(args)
+    host, port = server.server_address
+    base_url = f"http://{host}:{port}{article_path}?bbs_id=5&indexno="
+    start = args.start if args.start is not None else server.manifest["start"]
+    end = args.end if args.end is not None else server.manifest["end"]
+
+    results = []
+    for mode in args.modes:
+        for repeat in range(args.repeat):
+            command = [sys.executable, os.path.abspath(__file__), "run-one",
+                       "--mode", mode, "--base-url", base_url,
+                       "--start", str(start), "--end", str(end), "--rps", str(args.rps)]
+            output = subprocess.check_output(command, text=True)
+            result = json.loads(output.strip().splitlines()[-1])
+            result["repeat"] = repeat
+            results.append(result)
+            rss = result["peak_rss_kb"]
+            child_rss = result.get("child_peak_rss_kb")
+            print(f"{mode:<10} 게시글 {result['articles_per_second']:7.2f}/s  이미지 {result['images_per_second']:7.2f}/s  "
+                  f"CPU {result['cpu_seconds']:6.2f}s  최대 메모리 {rss / 1024 if rss else 0:6.1f}MB  "
+                  f"(자식 프로세스 최대 {child_rss / 1024 if child_rss else 0:6.1f}MB)  오류 {result['errors']}")
+    server.shutdown()
+
+    report = {
+        "revision": git_revision(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "settings": {
+            "start": start, "end": end, "latency": args.latency, "error_rate": args.error_rate,
+            "rate_429": args.rate_429, "rps": args.rps
+        },
+        "results": results
+    }
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"{datetime.now():%Y%m%d_%H%M%S}_{report['revision']}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {path}")
+
+def compare(args):
+    """두 결과 파일의 방식별 처리량/CPU/메모리를 비교합니다."""
+    def load(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        best = {}
+        for result in report["results"]:
+            current = best.get(result["mode"])
+            if current is None or result["articles_per_second"] > current["articles_per_second"]:
+                best[result["mode"]] = result
+        return report["revision"], best
+
+    old_rev, old = load(args.old)
+    new_rev, new = load(args.new)
+    print(f"{old_rev} → {new_rev}")
+    for mode in sorted(set(old) & set(new)):
+        for key in ["articles_per_second", "images_per_second", "cpu_seconds", "peak_rss_kb", "child_peak_rss_kb"]:
+            before, after = old[mode].get(key), new[mode].get(key)
+            if not before or after is None:
+                continue
+            print(f"{mode:<10} {key:<20} {before:10.2f} → {after:10.2f} ({(after / before - 1) * 100:+.1f}%)")
+
+def add_server_options(parser):
+    parser.add_argument("--fixtures", default=fixture_dir)
+    parser.add_argument("--latency", type=float, default=0.05, help="응답 지연(초), ±50%% 무작위")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 응답 비율")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="429 응답 비율")
+
+def main():
+    parser = argparse.ArgumentParser(description="a.py 오프라인 벤치마크")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("record", help="실제 사이트에서 fixture 기록")
+    p.add_argument("--fixtures", default=fixture_dir)
+    p.add_argument("--start", type=int, required=True)
+    p.add_argument("--end", type=int, required=True)
+    p.add_argument("--delay", type=float, default=1.0, help="요청 사이 대기(초)")
+    p.set_defaults(func=record)
+
+    p = sub.add_parser("serve", help="재생 서버만 실행")
+    add_server_options(p)
+    p.add_argument("--port", type=int, default=8765)
+    p.set_defaults(func=serve)
+
+    p = sub.add_parser("run", help="벤치마크 실행")
+    add_server_options(p)
+    p.add_argument("--modes", nargs="+", default=["sequential", "async", "pipeline"])
+    p.add_argument("--start", type=int)
+    p.add_argument("--end", type=int)
+    p.add_argument("--rps", type=float, default=1000.0, help="a.py의 초당 요청 제한")
+    p.add_argument("--repeat", type=int, default=1)
+    p.add_argument("--output", default=results_dir)
+    p.set_defaults(func=run)
+
+    p = sub.add_parser("run-one", help=argparse.SUPPRESS)
+    p.add_argument("--mode", required=True)
+    p.add_argument("--base-url", required=True)
+    p.add_argument("--start", type=int, required=True)
+    p.add_argument("--end", type=int, required=True)
+    p.add_argument("--rps", type=float, required=True)
+    p.set_defaults(func=run_one)
+
+    p = sub.add_parser("compare", help="두 결과 비교")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -3,24 +3,195 @@ import datetime
 import os
 import time
 import threading
-import keyboard
+import queue
 import json
-from pydub import AudioSegment
-from pydub.silence import split_on_silence
+import math
+import argparse
+import subprocess
+import wave
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+class RecognizerBackend:
+    """음성 인식 엔진 공통 인터페이스
+
+    모델은 생성할 때 한 번만 불러오고 계속 재사용합니다. 엔진마다 recognize를 구현하며,
+    인식하지 못하면 sr.UnknownValueError, 서비스 문제면 sr.RequestError를 발생시킵니다.
+    transcribe는 이 오류를 노트에 남길 문구로 바꿉니다. 둘 다 여러 인식 작업자 스레드에서
+    동시에 호출되므로 엔진마다 스레드에 안전하게 구현합니다.
+    """
+    name = "base"
+
+    def __init__(self, config):
+        self.config = config
+        self.language = config.get("language", "ko-KR")
+
+    def recognize(self, audio):
+        raise NotImplementedError
+
+    def transcribe(self, audio):
+        try:
+            return self.recognize(audio)
+        except sr.UnknownValueError:
+            return "[음성 인식 실패]"
+        except sr.RequestError:
+            return "[음성 인식 서비스 오류]"
+
+    def warm_up(self):
+        """짧은 무음으로 한 번 실행해 첫 구간이 늦어지지 않게 합니다."""
+        silence = sr.AudioData(b"\0\0" * 8000, 16000, 2)
+        self.transcribe(silence)
+
+class GoogleBackend(RecognizerBackend):
+    """구글 웹 음성 인식 (구간마다 네트워크 요청)"""
+    name = "google"
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.recognizer = sr.Recognizer()
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_google(audio, language=self.language)
+
+    def warm_up(self):
+        pass  # 불러올 모델이 없음
+
+class VoskBackend(RecognizerBackend):
+    """Vosk(Kaldi) 오프라인 인식. 모델은 하나를 공유하고 작업자 스레드마다 인식기를 따로 둡니다."""
+    name = "vosk"
+
+    def __init__(self, config):
+        super().__init__(config)
+        from vosk import Model, KaldiRecognizer, SetLogLevel
+        SetLogLevel(-1)
+        self.KaldiRecognizer = KaldiRecognizer
+        self.model = Model(config.get("vosk_model_path", "vosk-model-small-ko-0.22"))
+        self.local = threading.local()
+
+    def recognize(self, audio):
+        recognizer = getattr(self.local, "recognizer", None)
+        if recognizer is None:
+            recognizer = self.local.recognizer = self.KaldiRecognizer(self.model, 16000)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=16000, convert_width=2))
+        # FinalResult는 결과를 돌려주고 인식기를 초기화하므로 다음 구간에 그대로 재사용 가능
+        text = json.loads(recognizer.FinalResult()).get("text", "")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+class WhisperBackend(RecognizerBackend):
+    """faster-whisper(CTranslate2) CPU 인식. int8 모델 하나를 여러 작업자가 함께 사용합니다.
+
+    whisper_threads(0이면 모든 코어)와 whisper_workers(기본: recognition_workers)로 CPU 사용량을
+    정합니다. 일괄 변환은 프로세스마다 코어를 나눠 주도록 두 값을 덮어씁니다.
+    """
+    name = "whisper"
+
+    def __init__(self, config):
+        super().__init__(config)
+        import numpy as np
+        from faster_whisper import WhisperModel
+        self.np = np
+        self.model = WhisperModel(
+            config.get("whisper_model", "small"),
+            device="cpu",
+            compute_type=config.get("whisper_compute_type", "int8"),
+            cpu_threads=config.get("whisper_threads", 0),
+            num_workers=config.get("whisper_workers", config.get("recognition_workers", 4))
+        )
+
+    def recognize(self, audio):
+        raw = audio.get_raw_data(convert_rate=16000, convert_width=2)
+        samples = self.np.frombuffer(raw, dtype=self.np.int16).astype(self.np.float32) / 32768.0
+        segments, _ = self.model.transcribe(samples, language=self.language.split("-")[0], beam_size=1)
+        text = " ".join(segment.text.strip() for segment in segments)
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+recognizer_backends = {
+    "google": GoogleBackend,
+    "vosk": VoskBackend,
+    "whisper": WhisperBackend
+}
+
+def create_backend(config):
+    """설정의 "recognizer" 값에 맞는 인식 엔진을 만들고 미리 한 번 실행해 둡니다."""
+    name = config.get("recognizer", "google")
+    if name not in recognizer_backends:
+        print(f"알 수 없는 인식 엔진 '{name}', google을 사용합니다.")
+        name = "google"
+    started = time.perf_counter()
+    backend = recognizer_backends[name](config)
+    backend.warm_up()
+    if name != "google":
+        print(f"인식 엔진 준비 완료: {name} ({time.perf_counter() - started:.1f}초)")
+    return backend
+
+# 설정 파일은 실행 위치와 상관없이 이 파일 옆의 것을 사용 (STT_test.py 등 다른 스크립트와 공유)
+RECORDER_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recorder_config.json")
+
+def load_recorder_config(config_file=RECORDER_CONFIG_FILE):
+    """설정 파일을 읽습니다. 없거나 읽을 수 없으면 기본 설정을 반환합니다."""
+    if os.path.exists(config_file):
+        try:
+            with open(config_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except:
+            pass
+    return {
+        "energy_threshold": 4000,
+        "dynamic_energy_threshold": True,
+        "pause_threshold": 0.8,
+        "language": "ko-KR",
+        "timeout": 60,
+        "last_subject": "기본 강의",
+        "recognizer": "google",
+        "vosk_model_path": "vosk-model-small-ko-0.22",
+        "whisper_model": "small",
+        "recognition_workers": 4,
+        "transcribe_processes": os.cpu_count() or 2,
+        "block_seconds": 300,
+        "min_silence_ms": 700,
+        "silence_offset_db": -16,
+        "silence_window_seconds": 60,
+        "keep_silence_ms": 200,
+        "max_chunk_seconds": 30
+    }
 
 class LectureRecorder:
-    def __init__(self):
+    """강의를 녹음하면서 텍스트로 변환해 노트 파일에 기록합니다.
+
+    녹음 스레드는 말소리 구간을 잘라 대기열에 넣기만 하고, 인식 작업자 여러 개가 동시에
+    변환합니다. 결과는 녹음된 순서대로 다시 맞춰서 기록하므로 인식이 느려도 그 사이의
+    말소리를 놓치지 않습니다.
+
+    인식 엔진은 recorder_config.json의 "recognizer"(google, vosk, whisper)로 고릅니다.
+    recognize(오디오 -> 텍스트)와 audio_source(예: sr.AudioFile)를 넘기면 마이크와 인식 엔진
+    대신 사용합니다 (WAV 파일과 가짜 인식기로 시험할 때).
+    """
+    def __init__(self, recognize=None, audio_source=None):
         self.recognizer = sr.Recognizer()
-        self.mic = sr.Microphone()
+        self.mic = audio_source or sr.Microphone()
+        self.custom_recognize = recognize
+        # 파일 입력은 주변 소음 조정을 하지 않음 (앞부분 1초를 버리게 됨)
+        self.adjust_noise = audio_source is None
         self.running = False
         self.pause = False
         self.current_subject = "기본 강의"
         self.today = datetime.datetime.now().strftime("%Y-%m-%d")
         self.notes_folder = "lecture_notes"
         self.audio_folder = "lecture_audio"
-        self.config_file = "recorder_config.json"
+        self.config_file = RECORDER_CONFIG_FILE
         self.subjects = ["기본 강의", "수학", "물리학", "프로그래밍", "기타"]
         self.config = self.load_config()
+        self.notes_file = None
+        
+        # 녹음 구간 대기열과 순서 맞추기용 상태
+        self.segments = queue.Queue()
+        self.write_lock = threading.Lock()
+        self.pending = {}
+        self.next_seq = 0
         
         # 폴더 생성
         for folder in [self.notes_folder, self.audio_folder]:
@@ -32,21 +203,19 @@ class LectureRecorder:
         self.recognizer.dynamic_energy_threshold = self.config.get("dynamic_energy_threshold", True)
         self.recognizer.pause_threshold = self.config.get("pause_threshold", 0.8)
         
+        # 인식 엔진 (모델은 여기서 한 번만 불러옴)
+        self.backend = None
+        self.load_backend()
+        
+    def load_backend(self):
+        if self.custom_recognize:
+            self.recognize = self.custom_recognize
+        else:
+            self.backend = create_backend(self.config)
+            self.recognize = self.backend.transcribe
+    
     def load_config(self):
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except:
-                pass
-        return {
-            "energy_threshold": 4000,
-            "dynamic_energy_threshold": True,
-            "pause_threshold": 0.8,
-            "language": "ko-KR",
-            "timeout": 60,
-            "last_subject": "기본 강의"
-        }
+        return load_recorder_config(self.config_file)
     
     def save_config(self):
         self.config["last_subject"] = self.current_subject
@@ -89,17 +258,11 @@ class LectureRecorder:
         return os.path.join(folder, f"{self.today}_{subject_safe}_{timestamp}.{ext}")
     
     def process_audio_to_text(self, audio_data):
-        try:
-            text = self.recognizer.recognize_google(audio_data, language=self.config.get("language", "ko-KR"))
-            return text
-        except sr.UnknownValueError:
-            return "[음성 인식 실패]"
-        except sr.RequestError:
-            return "[음성 인식 서비스 오류]"
+        return self.recognize(audio_data)
     
-    def save_text(self, text):
-        notes_file = self.get_filename("text")
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    def save_text(self, text, captured_at=None):
+        notes_file = self.notes_file or self.get_filename("text")
+        timestamp = (captured_at or datetime.datetime.now()).strftime("%H:%M:%S")
         
         with open(notes_file, "a", encoding="utf-8") as file:
             file.write(f"[{timestamp}] {text}\n\n")
@@ -127,6 +290,7 @@ class LectureRecorder:
             time.sleep(0.5)
     
     def hotkey_handler(self):
+        import keyboard
         while self.running:
             if keyboard.is_pressed('p'):
                 self.pause = not self.pause
@@ -135,66 +299,137 @@ class LectureRecorder:
                 self.running = False
                 time.sleep(0.3)
     
-    def start(self):
-        self.select_subject()
+    def capture_loop(self):
+        """녹음 스레드: 말소리 구간을 잘라 (순번, 녹음 시각, 오디오)로 대기열에 넣습니다."""
+        seq = 0
+        started = datetime.datetime.now()
+        try:
+            while self.running:
+                if self.pause:
+                    time.sleep(0.2)  # 일시정지 상태에서 CPU 사용량 줄이기
+                    continue
+                
+                with self.mic as source:
+                    if self.adjust_noise:
+                        print("\n주변 소음 조정 중...")
+                        self.recognizer.adjust_for_ambient_noise(source)
+                    
+                    while self.running and not self.pause:
+                        print("\n듣는 중...")
+                        try:
+                            audio = self.recognizer.listen(source, timeout=self.config.get("timeout", 60))
+                        except sr.WaitTimeoutError:
+                            print("\n일정 시간 동안 말소리가 감지되지 않았습니다.")
+                            continue
+                        
+                        if not audio.frame_data:
+                            # 파일 입력이 끝남
+                            self.running = False
+                            break
+                        
+                        # 구간이 끝난 시각에서 길이만큼 빼서 말을 시작한 시각을 구함
+                        # (파일 입력은 실제 시간보다 빨리 읽히므로 파일 안의 위치 기준)
+                        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+                        reader = getattr(source, "audio_reader", None)
+                        if reader is not None and hasattr(reader, "tell"):
+                            end_offset = reader.tell() / source.SAMPLE_RATE
+                            captured_at = started + datetime.timedelta(seconds=end_offset - duration)
+                        else:
+                            captured_at = datetime.datetime.now() - datetime.timedelta(seconds=duration)
+                        self.segments.put((seq, captured_at, audio))
+                        seq += 1
+        except Exception as e:
+            print(f"\n녹음 오류: {e}")
+            self.running = False
+    
+    def recognition_worker(self):
+        """인식 작업자: 대기열에서 구간을 하나씩 꺼내 변환합니다. None을 받으면 종료합니다."""
+        while True:
+            item = self.segments.get()
+            if item is None:
+                return
+            seq, captured_at, audio = item
+            try:
+                text = self.recognize(audio)
+            except Exception as e:
+                print(f"\n음성 인식 오류: {e}")
+                text = None
+            self.deliver(seq, captured_at, text, audio)
+    
+    def deliver(self, seq, captured_at, text, audio):
+        """인식 결과를 받아 앞 순번이 모두 끝난 것부터 녹음 순서대로 기록합니다."""
+        with self.write_lock:
+            self.pending[seq] = (captured_at, text, audio)
+            while self.next_seq in self.pending:
+                captured_at, text, audio = self.pending.pop(self.next_seq)
+                self.next_seq += 1
+                if text:
+                    print(f"\n인식된 텍스트: {text}")
+                    self.save_text(text, captured_at)
+                    
+                    # 선택적으로 오디오 저장
+                    if self.config.get("save_audio", False):
+                        self.save_audio(audio)
+    
+    def start(self, interactive=True):
+        """녹음을 시작합니다. 녹음이 끝나고 남은 인식까지 기록한 뒤 노트 파일 경로를 반환합니다."""
+        if interactive:
+            self.select_subject()
         self.running = True
         self.pause = False
+        self.pending = {}
+        self.next_seq = 0
         
-        # 상태 표시 스레드 시작
-        status_thread = threading.Thread(target=self.status_display)
-        status_thread.daemon = True
-        status_thread.start()
-        
-        # 핫키 처리 스레드 시작
-        hotkey_thread = threading.Thread(target=self.hotkey_handler)
-        hotkey_thread.daemon = True
-        hotkey_thread.start()
+        if interactive:
+            # 상태 표시 스레드 시작
+            status_thread = threading.Thread(target=self.status_display)
+            status_thread.daemon = True
+            status_thread.start()
+            
+            # 핫키 처리 스레드 시작
+            hotkey_thread = threading.Thread(target=self.hotkey_handler)
+            hotkey_thread.daemon = True
+            hotkey_thread.start()
         
         # 시작 정보 기록
         print("\n" + "="*50)
         print(f"강의 녹음 시작: {self.current_subject}")
         print("="*50)
         
-        notes_file = self.get_filename("text")
-        with open(notes_file, "w", encoding="utf-8") as file:
+        self.notes_file = self.get_filename("text")
+        with open(self.notes_file, "w", encoding="utf-8") as file:
             file.write(f"강의: {self.current_subject}\n")
             file.write(f"날짜: {self.today}\n")
             file.write("="*50 + "\n\n")
         
-        # 메인 녹음 루프
+        # 인식 작업자와 녹음 스레드 시작
+        workers = [threading.Thread(target=self.recognition_worker, daemon=True)
+                   for _ in range(self.config.get("recognition_workers", 4))]
+        for worker in workers:
+            worker.start()
+        capture_thread = threading.Thread(target=self.capture_loop, daemon=True)
+        capture_thread.start()
+        
         try:
-            while self.running:
-                if not self.pause:
-                    with self.mic as source:
-                        print("\n주변 소음 조정 중...")
-                        self.recognizer.adjust_for_ambient_noise(source)
-                        print("듣는 중...")
-                        
-                        try:
-                            audio = self.recognizer.listen(source, timeout=self.config.get("timeout", 60))
-                            
-                            # 텍스트 변환 및 저장
-                            text = self.process_audio_to_text(audio)
-                            if text:
-                                print(f"\n인식된 텍스트: {text}")
-                                self.save_text(text)
-                                
-                                # 선택적으로 오디오 저장
-                                if self.config.get("save_audio", False):
-                                    self.save_audio(audio)
-                        
-                        except sr.WaitTimeoutError:
-                            print("\n일정 시간 동안 말소리가 감지되지 않았습니다.")
-                else:
-                    time.sleep(1)  # 일시정지 상태에서 CPU 사용량 줄이기
-                    
+            while self.running and capture_thread.is_alive():
+                time.sleep(0.2)
         except KeyboardInterrupt:
             pass
         finally:
+            self.running = False
+            capture_thread.join()
+            # 남은 구간을 모두 인식한 뒤 종료
+            print("\n남은 음성 인식 중...")
+            for _ in workers:
+                self.segments.put(None)
+            for worker in workers:
+                worker.join()
+            
             print("\n" + "="*50)
             print("강의 녹음 종료")
             print("="*50)
             self.save_config()
+        return self.notes_file
     
     def settings(self):
         print("\n=== 설정 메뉴 ===")
@@ -202,7 +437,8 @@ class LectureRecorder:
         print("2. 음성 감지 민감도 설정")
         print("3. 오디오 저장 여부")
         print("4. 변환 시간 간격 설정")
-        print("5. 뒤로 가기")
+        print("5. 음성 인식 엔진 선택")
+        print("6. 뒤로 가기")
         
         choice = input("선택: ")
         
@@ -236,9 +472,240 @@ class LectureRecorder:
             except ValueError:
                 print("유효한 숫자를 입력해주세요.")
         
+        elif choice == "5":
+            print(f"\n사용 가능한 엔진: {', '.join(recognizer_backends)} (vosk/whisper는 오프라인, 모델 필요)")
+            name = input(f"인식 엔진 입력 (현재: {self.config.get('recognizer', 'google')}): ").strip()
+            if name in recognizer_backends:
+                self.config["recognizer"] = name
+                try:
+                    self.load_backend()
+                except Exception as e:
+                    print(f"인식 엔진을 불러오지 못했습니다: {e}")
+                    self.config["recognizer"] = "google"
+                    self.load_backend()
+            elif name:
+                print("알 수 없는 엔진입니다.")
+        
         self.save_config()
 
+def transcribe_wav(path, recognize=None, subject="기본 강의"):
+    """마이크 대신 WAV 파일을 입력으로 녹음 과정을 그대로 실행합니다. 노트 파일 경로를 반환합니다."""
+    recorder = LectureRecorder(recognize=recognize, audio_source=sr.AudioFile(path))
+    recorder.current_subject = subject
+    return recorder.start(interactive=False)
+
+# 일괄 변환은 모두 16kHz 모노 16비트로 맞춰서 처리
+TRANSCRIBE_RATE = 16000
+# 무음 기준을 다시 계산하는 간격 (읽은 블록을 이 길이로 나눠 차례로 검사)
+SILENCE_STEP_MS = 10000
+
+def read_audio_blocks(path, block_seconds):
+    """긴 오디오 파일을 16kHz 모노 PCM으로 block_seconds초씩 읽습니다 (파일 전체를 메모리에 올리지 않음).
+
+    WAV는 wave 모듈로 바로 읽고, 그 밖의 형식(MP3 등)은 ffmpeg 파이프로 디코딩합니다.
+    """
+    from pydub import AudioSegment
+    if path.lower().endswith(".wav"):
+        with wave.open(path, "rb") as wav:
+            frames = block_seconds * wav.getframerate()
+            while True:
+                data = wav.readframes(frames)
+                if not data:
+                    break
+                block = AudioSegment(data=data, sample_width=wav.getsampwidth(),
+                                     frame_rate=wav.getframerate(), channels=wav.getnchannels())
+                yield block.set_channels(1).set_frame_rate(TRANSCRIBE_RATE).set_sample_width(2)
+        return
+    
+    command = ["ffmpeg", "-v", "error", "-i", path, "-f", "s16le", "-ac", "1", "-ar", str(TRANSCRIBE_RATE), "-"]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    try:
+        block_bytes = block_seconds * TRANSCRIBE_RATE * 2
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            yield AudioSegment(data=data, sample_width=2, frame_rate=TRANSCRIBE_RATE, channels=1)
+    finally:
+        process.stdout.close()
+        process.wait()
+    if process.returncode:
+        raise RuntimeError(f"ffmpeg 디코딩 실패 (종료 코드 {process.returncode}): {path}")
+
+def split_stream_on_silence(blocks, config):
+    """블록 단위로 들어오는 오디오를 무음 기준으로 나눠 (시작 ms, 끝 ms, 구간 오디오)를 차례로 돌려줍니다.
+
+    split_on_silence와 같은 기준(detect_nonsilent)을 쓰되 위치(ms)를 함께 돌려줍니다. 블록 끝에서
+    말이 이어지고 있을 수 있으므로 마지막 구간은 확정하지 않고 다음 블록 앞에 붙여 다시
+    검사합니다. 무음 없이 max_chunk_seconds를 넘는 구간은 강제로 자릅니다.
+    
+    무음 기준은 SILENCE_STEP_MS마다 최근 silence_window_seconds 동안의 평균 음량 +
+    silence_offset_db로 다시 계산하므로, 강의 중간에 마이크 거리나 주변 소음이 바뀌어도 따라갑니다.
+    """
+    from pydub.silence import detect_nonsilent
+    min_silence = config.get("min_silence_ms", 700)
+    keep = config.get("keep_silence_ms", 200)
+    max_chunk = config.get("max_chunk_seconds", 30) * 1000
+    offset_db = config.get("silence_offset_db", -16)
+    # 최근 구간들의 평균 전력 (rms^2). 완전한 무음 구간은 기준을 끌어내리지 않도록 넣지 않음
+    recent_power = deque(maxlen=max(1, config.get("silence_window_seconds", 60) * 1000 // SILENCE_STEP_MS))
+    silence_thresh = -50
+    carry = None
+    carry_start = 0  # carry의 시작 위치 (파일 기준 ms)
+    
+    def emit(audio, offset, start, end):
+        # 너무 긴 구간은 max_chunk 단위로 나눔
+        for piece_start in range(start, end, max_chunk):
+            piece_end = min(piece_start + max_chunk, end)
+            chunk = audio[max(0, piece_start - keep):min(len(audio), piece_end + keep)]
+            yield offset + piece_start, offset + piece_end, chunk
+    
+    def steps(blocks):
+        for block in blocks:
+            for start in range(0, len(block), SILENCE_STEP_MS):
+                yield block[start:start + SILENCE_STEP_MS]
+    
+    for step in steps(blocks):
+        if step.rms:
+            recent_power.append(step.rms ** 2)
+        if recent_power:
+            mean_rms = math.sqrt(sum(recent_power) / len(recent_power))
+            silence_thresh = 20 * math.log10(mean_rms / step.max_possible_amplitude) + offset_db
+        audio = carry + step if carry is not None else step
+        ranges = detect_nonsilent(audio, min_silence_len=min_silence, silence_thresh=silence_thresh, seek_step=10)
+        
+        # 마지막 구간 뒤에 충분한 무음이 없으면 다음 블록으로 넘김
+        cut = len(audio)
+        if ranges and len(audio) - ranges[-1][1] < min_silence:
+            cut = max(0, ranges[-1][0] - keep)
+            ranges = ranges[:-1]
+        for start, end in ranges:
+            yield from emit(audio, carry_start, start, end)
+        
+        carry = audio[cut:]
+        carry_start += cut
+        # 무음 없이 계속 길어지면 강제로 자름
+        while len(carry) > max_chunk:
+            yield carry_start, carry_start + max_chunk, carry[:max_chunk]
+            carry = carry[max_chunk:]
+            carry_start += max_chunk
+    
+    if carry is not None and len(carry):
+        for start, end in detect_nonsilent(carry, min_silence_len=min_silence, silence_thresh=silence_thresh, seek_step=10):
+            yield from emit(carry, carry_start, start, end)
+
+worker_backend = None
+
+def init_transcribe_worker(config):
+    """변환 프로세스마다 인식 엔진을 한 번 불러옵니다."""
+    global worker_backend
+    worker_backend = create_backend(config)
+
+def transcribe_chunk(pcm):
+    return worker_backend.transcribe(sr.AudioData(pcm, TRANSCRIBE_RATE, 2))
+
+def format_offset(ms):
+    seconds = ms // 1000
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+def transcribe_file(path, config, processes=None, notes_folder="lecture_notes"):
+    """녹음 파일 하나를 무음 기준으로 나눠 프로세스 풀에서 변환하고, 시간 순서대로 한 파일에 기록합니다.
+
+    나누기는 이 프로세스에서 블록 단위로 진행하고, 변환 중인 구간 수를 프로세스 수의 4배로
+    제한하므로 긴 파일도 메모리 사용량이 일정합니다. 결과는 가장 오래된 구간부터 기다려서
+    쓰기 때문에 순서가 유지됩니다. 결과 파일 경로를 반환합니다.
+    """
+    processes = processes or config.get("transcribe_processes") or os.cpu_count() or 2
+    os.makedirs(notes_folder, exist_ok=True)
+    name = os.path.splitext(os.path.basename(path))[0]
+    output_file = os.path.join(notes_folder, f"{name}_transcript.txt")
+    
+    started = time.perf_counter()
+    chunks = 0
+    audio_ms = 0
+    # 프로세스마다 모든 코어를 쓰면 서로 경쟁하므로 코어를 나눠 주고 whisper 작업자는 하나만 둠
+    worker_config = dict(config, whisper_threads=max(1, (os.cpu_count() or 1) // processes), whisper_workers=1)
+    with ProcessPoolExecutor(max_workers=processes, initializer=init_transcribe_worker, initargs=(worker_config,)) as pool, \
+            open(output_file, "w", encoding="utf-8") as f:
+        f.write(f"파일: {os.path.basename(path)}\n")
+        f.write(f"변환: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}\n")
+        f.write("="*50 + "\n\n")
+        
+        in_flight = deque()
+        
+        def write_oldest():
+            start, end, future = in_flight.popleft()
+            try:
+                text = future.result()
+            except Exception as e:
+                text = f"[음성 인식 오류: {e}]"
+            if text:
+                f.write(f"[{format_offset(start)}] {text}\n\n")
+                f.flush()
+        
+        blocks = read_audio_blocks(path, config.get("block_seconds", 300))
+        for start, end, chunk in split_stream_on_silence(blocks, config):
+            in_flight.append((start, end, pool.submit(transcribe_chunk, chunk.raw_data)))
+            chunks += 1
+            audio_ms = end
+            while len(in_flight) >= processes * 4:
+                write_oldest()
+        while in_flight:
+            write_oldest()
+    
+    elapsed = time.perf_counter() - started
+    print(f"{os.path.basename(path)}: {chunks}개 구간, 마지막 말소리 {format_offset(audio_ms)}, "
+          f"{elapsed:.1f}초 소요 (프로세스 {processes}개) -> {output_file}")
+    return output_file
+
+def benchmark(paths, recognizer=None):
+    """WAV 파일마다 인식 시간을 재서 실시간 배율(RTF = 처리 시간 / 오디오 길이)을 출력합니다."""
+    config = load_recorder_config()
+    if recognizer:
+        config["recognizer"] = recognizer
+    
+    started = time.perf_counter()
+    backend = create_backend(config)
+    print(f"엔진: {backend.name}, 모델 준비(불러오기 + 예열): {time.perf_counter() - started:.2f}초")
+    
+    total_audio = total_time = 0.0
+    for path in paths:
+        with sr.AudioFile(path) as source:
+            audio = sr.Recognizer().record(source)
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        t0 = time.perf_counter()
+        text = backend.transcribe(audio)
+        elapsed = time.perf_counter() - t0
+        total_audio += duration
+        total_time += elapsed
+        print(f"{os.path.basename(path)}: {duration:.1f}초 오디오, {elapsed:.2f}초 처리, RTF {elapsed / duration if duration else 0:.3f} | {text[:40]}")
+    
+    if total_audio:
+        print(f"전체: {total_audio:.1f}초 오디오, {total_time:.2f}초 처리, RTF {total_time / total_audio:.3f}")
+
 def main():
+    parser = argparse.ArgumentParser(description="강의 녹음 시스템")
+    sub = parser.add_subparsers(dest="command")
+    p = sub.add_parser("benchmark", help="WAV 파일로 인식 엔진의 실시간 배율(RTF) 측정")
+    p.add_argument("wav", nargs="+", help="측정할 WAV 파일")
+    p.add_argument("--recognizer", choices=list(recognizer_backends), default=None, help="설정 대신 사용할 인식 엔진")
+    p = sub.add_parser("transcribe", help="녹음 파일(WAV/MP3 등)을 무음 기준으로 나눠 여러 프로세스로 일괄 변환")
+    p.add_argument("files", nargs="+", help="변환할 녹음 파일")
+    p.add_argument("--recognizer", choices=list(recognizer_backends), default=None, help="설정 대신 사용할 인식 엔진")
+    p.add_argument("--processes", type=int, default=None, help="변환 프로세스 수 (기본: CPU 코어 수)")
+    args = parser.parse_args()
+    
+    if args.command == "benchmark":
+        benchmark(args.wav, args.recognizer)
+        return
+    if args.command == "transcribe":
+        config = load_recorder_config()
+        if args.recognizer:
+            config["recognizer"] = args.recognizer
+        for path in args.files:
+            transcribe_file(path, config, args.processes)
+        return
+    
     recorder = LectureRecorder()
     
     while True:
@@ -1,9 +1,19 @@
 import speech_recognition as sr
+import os
+import sys
+
+# 인식 엔진은 python-is-fun/recorder_config.json(d.py와 같은 설정)의 "recognizer"(google, vosk, whisper)로 고름
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python-is-fun"))
+from d import load_recorder_config, create_backend
+
+config = load_recorder_config()
+# 모델은 시작할 때 한 번만 불러와서 계속 사용
+backend = create_backend(config)
 
 recognizer = sr.Recognizer()
 mic = sr.Microphone()
 
-print("강의 녹음을 시작합니다. (Ctrl + C로 종료)")
+print(f"강의 녹음을 시작합니다. (Ctrl + C로 종료, 인식 엔진: {backend.name})")
 
 # 텍스트 파일 초기화 (덮어쓰기 방지)
 with open("lecture_notes.txt", "w", encoding="utf-8") as file:
@@ -16,7 +26,8 @@ while True:
             print("듣는 중...")
             audio = recognizer.listen(source, timeout=60)  # 60초마다 녹음 후 변환
 
-        text = recognizer.recognize_google(audio, language="ko-KR")
+        # 인식 실패/서비스 오류는 예외로 받아 노트에 쓰지 않음
+        text = backend.recognize(audio)
         print("변환된 텍스트:", text)
 
         # 파일에 변환된 텍스트 저장
@@ -0,0 +1,122 @@
+"""Local stand-in for the MMA nexacro dataset backend used by myself.py --direct
+
+Replays responses recorded with `myself.py --direct --record-dir DIR`. A request is answered
+with DIR/<params key>.xml when that recording exists, otherwise DIR/default.xml.
+`--generate N` writes a synthetic default.xml with N listings for quick benchmarks.
+
+    python mma_standin.py --responses recorded --port 8766
+    MMA_BACKEND_URL=http://127.0.0.1:8766/ MMA_SSO_TOKEN=test python myself.py --direct
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import hashlib
+import json
+import os
+import time
+import xml.etree.ElementTree as ET
+
+NEXACRO_NS = "http://www.nexacroplatform.com/platform/dataset"
+
+OUTPUT_COLUMNS = ["eopche_nm", "eopjong_nm", "juso", "bokmu_hyeongtae", "detail_url"]
+
+def request_params(body):
+    """Read the inputVO row of a nexacro request as a dict"""
+    root = ET.fromstring(body)
+    for dataset in root.iter(f"{{{NEXACRO_NS}}}Dataset"):
+        if dataset.get("id") == "inputVO":
+            row = dataset.find(f"{{{NEXACRO_NS}}}Rows/{{{NEXACRO_NS}}}Row")
+            if row is not None:
+                return {col.get("id"): col.text or "" for col in row}
+    return {}
+
+def params_key(params):
+    """Same key as myself.search_params_key"""
+    normalized = json.dumps({k: str(v) for k, v in params.items()}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+def generate_response(count):
+    """Build a synthetic dataset response with count listings"""
+    rows = []
+    for i in range(count):
+        rows.append(
+            "<Row>"
+            f"<Col id=\"eopche_nm\">테스트업체{i}</Col>"
+            "<Col id=\"eopjong_nm\">정보처리</Col>"
+            f"<Col id=\"juso\">서울특별시 강남구 테헤란로 {i}</Col>"
+            "<Col id=\"bokmu_hyeongtae\">현역</Col>"
+            f"<Col id=\"detail_url\">https://work.mma.go.kr/caisBYIS/search/byjjecgeomjeongView.do?id={i}</Col>"
+            "</Row>"
+        )
+    columns = "".join(f"<Column id=\"{c}\" type=\"STRING\" size=\"256\" />" for c in OUTPUT_COLUMNS)
+    return (
+        "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+        f"<Root xmlns=\"{NEXACRO_NS}\">"
+        "<Parameters><Parameter id=\"ErrorCode\" type=\"int\">0</Parameter><Parameter id=\"ErrorMsg\" type=\"string\" /></Parameters>"
+        f"<Dataset id=\"outputVO\"><ColumnInfo>{columns}</ColumnInfo><Rows>{''.join(rows)}</Rows></Dataset>"
+        "</Root>"
+    ).encode("utf-8")
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            key = params_key(request_params(body))
+        except ET.ParseError:
+            self.send_error(400, "request is not a nexacro dataset")
+            return
+
+        for name in (f"{key}.xml", "default.xml"):
+            path = os.path.join(self.server.responses, name)
+            if os.path.exists(path):
+                break
+        else:
+            self.send_error(404, f"no recorded response for {key}")
+            return
+
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        with open(path, "rb") as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+def main():
+    parser = argparse.ArgumentParser(description="MMA dataset backend stand-in")
+    parser.add_argument("--responses", default="mma_responses", help="directory with recorded responses")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    parser.add_argument("--generate", type=int, default=None, help="write a synthetic default.xml with N rows and exit")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    if args.generate is not None:
+        os.makedirs(args.responses, exist_ok=True)
+        path = os.path.join(args.responses, "default.xml")
+        with open(path, "wb") as f:
+            f.write(generate_response(args.generate))
+        print(f"Wrote {args.generate} rows to {path}")
+        return
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StandinHandler)
+    server.responses = args.responses
+    server.delay = args.delay
+    server.verbose = args.verbose
+    print(f"Serving {os.path.abspath(args.responses)} on http://127.0.0.1:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
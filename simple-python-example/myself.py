@@ -4,11 +4,23 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException, TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
+from concurrent.futures import ThreadPoolExecutor
 import csv
 import time
 import json
 import logging
+import argparse
+import hashlib
+import os
+import queue
+import threading
+import sqlite3
+import tempfile
+from datetime import datetime
+import requests
+import xml.etree.ElementTree as ET
 
 logging.basicConfig(
     level=logging.INFO,
@@ -24,7 +36,8 @@ XML_PAYLOAD = """<?xml version="1.0" encoding="UTF-8"?>
 <Root xmlns="http://www.nexacroplatform.com/platform/dataset">
     <Parameters>
         <Parameter id="SCOUTER">x4ukdpk8jj6p2b</Parameter>
-        <Parameter id="ssotoken">Vy3zFyENGINEx5F1zTyGIDx5FRAONx5F1zCy1744419662zPy86400zAy23zEysX1G118eCx2BwVx2BQHboU32qJV6JPUJ4MKfVRUPwZx79PIYk4Db8ZM5x7ADZAWlBvx79apD9YN49ux78L6EpfJZpiu7GFumwx79FHHx79Qkl72A1x7Apjcmpx7A8BRBBUWffoIPx79gx78a4knEs4Kugdb61HBQ8u2x2F4RMYsuuMwV8x7Alx2BZPmFKK62x78aLI1eXc7DfOa0VG1XKlulx78fLx78bKMKpmHvCHeCK1moHWSCPbx2Bx78158CY46hRMgiDx788pk2x2BXonJ9j7eIkNbifx7A3r6x79E4sooE7Z5Sax7AwT8uGi9qKYw7mVh5nUBJkg3H33GM7MenBAhB2x78b3qYLEpsO8rx2BYX7cqTOGT30M2l8Gx7AKYHu2YAL0Ua4J2U6ECBCFua4pwex7Adx2BsZG4x3DzKyCnvIx2B43ksFCTgEjK9Nl5Pmnx2BMx78l2QVi1x2FHcgR6UgrMkP8dh8V5YGLcJusgPcKrlTx00x00x00x00x00zSSy00002938051zUURy08ba5752053809bazMymaZAx7AWXUaIgx3Dz</Parameter>
+        <!-- ssotoken is session-bound: supplied at request time from MMA_SSO_TOKEN or the sso-token option -->
+        <Parameter id="ssotoken" />
     </Parameters>
     <Dataset id="inputVO">
         <ColumnInfo>
@@ -55,29 +68,179 @@ XML_PAYLOAD = """<?xml version="1.0" encoding="UTF-8"?>
     </Dataset>
 </Root>"""
 
+NEXACRO_NS = "http://www.nexacroplatform.com/platform/dataset"
+
+# Required for --direct. The nexacro dataset endpoint the search page POSTs to and a valid session
+# ssotoken: copy both from the browser's network tab while logged in (the token expires).
+# For testing, point the endpoint at a local stand-in server (mma_standin.py); any token works there.
+BACKEND_URL = os.environ.get("MMA_BACKEND_URL")
+SSO_TOKEN = os.environ.get("MMA_SSO_TOKEN")
+
+# Dataset columns that fill RESULT_HEADER[1:] (업체명, 업종, 소재지, 복무형태, 상세보기 링크)
+DATASET_RESULT_COLUMNS = ["eopche_nm", "eopjong_nm", "juso", "bokmu_hyeongtae", "detail_url"]
+
+# Resource blocking (Chrome DevTools Network.setBlockedURLs). This matches URL patterns, not the
+# resource type Chrome assigns: each group listed here blocks URLs ending in its file extensions,
+# with or without a query string (*.png and *.png?*). Files served without such an extension are
+# not blocked, and there is no allow list (setBlockedURLs cannot express exceptions), so keep the
+# patterns narrow. Images are additionally turned off by type through a content setting.
+BLOCKED_URL_GROUPS = ["image", "font", "media", "stylesheet"]
+URL_GROUP_EXTENSIONS = {
+    "image": ["png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "bmp"],
+    "font": ["woff", "woff2", "ttf", "otf", "eot"],
+    "media": ["mp4", "webm", "mp3", "ogg", "wav"],
+    "stylesheet": ["css"],
+}
+# Extra URL patterns to block regardless of type (analytics, ads)
+BLOCKED_URL_PATTERNS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*wcs.naver.net*",
+]
+
+# Search results are reused for this many seconds (use --refresh to force a new search)
+CACHE_DIR = "mma_cache"
+CACHE_TTL = 6 * 60 * 60
+
+driver_path = os.environ.get("CHROMEDRIVER_PATH")
+driver_path_lock = threading.Lock()
+
+def get_driver_path():
+    """Resolve the chromedriver binary once per process (ChromeDriverManager checks versions on every install())"""
+    global driver_path
+    with driver_path_lock:
+        if driver_path is None:
+            driver_path = ChromeDriverManager().install()
+            logger.info(f"Using chromedriver at {driver_path}")
+        return driver_path
+
+# Counts in-flight XHR/fetch requests so waits can key off network activity instead of fixed sleeps
+TRACK_REQUESTS_SCRIPT = """
+    window.__pendingRequests = 0;
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function(...args) {
+        window.__pendingRequests++;
+        this.addEventListener('loadend', () => window.__pendingRequests--);
+        return originalSend.apply(this, args);
+    };
+    const originalFetch = window.fetch;
+    window.fetch = function(...args) {
+        window.__pendingRequests++;
+        return originalFetch.apply(this, args).finally(() => window.__pendingRequests--);
+    };
+"""
+
+PAGE_IDLE_SCRIPT = """
+    return document.readyState === 'complete'
+        && !(window.__pendingRequests > 0)
+        && (!window.jQuery || window.jQuery.active === 0);
+"""
+
+# Selects an option and fires the change event the page listens for
+SELECT_OPTION_SCRIPT = """
+    const option = arguments[0];
+    option.selected = true;
+    option.parentElement.dispatchEvent(new Event('change', { bubbles: true }));
+"""
+
+# Same, looking the option up by its value; returns false if no option has that value
+SELECT_OPTION_BY_VALUE_SCRIPT = """
+    const option = document.querySelector(`option[value="${arguments[0]}"]`);
+    if(!option) {
+        return false;
+    }
+    option.selected = true;
+    option.parentElement.dispatchEvent(new Event('change', { bubbles: true }));
+    return true;
+"""
+
+# Codes of the captured request (XML_PAYLOAD); only these may fall back to matching the option by name
+DEFAULT_INDUSTRY_CD = "11111"  # 정보처리
+DEFAULT_SIGUNGU_CD = "1168000000"  # 강남구
+
+def wait_until_ready(driver, element=None, timeout=10):
+    """Wait until element (if given) is selected and the page has no requests in flight"""
+    try:
+        if element is not None:
+            WebDriverWait(driver, timeout).until(EC.element_to_be_selected(element))
+        WebDriverWait(driver, timeout, poll_frequency=0.05).until(lambda d: d.execute_script(PAGE_IDLE_SCRIPT))
+    except TimeoutException:
+        logger.warning("Timed out waiting for the page to settle")
+
 def setup_driver():
     """Setup and return configured Chrome WebDriver"""
     options = Options()
     options.add_argument("--start-maximized")
     options.add_argument("--disable-notifications")
     options.add_argument("--disable-popup-blocking")
-    options.add_argument("--disable-images")
     options.add_argument("--disable-gpu")
     options.add_argument("--no-sandbox")
     options.add_argument("--headless")
     
     options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36")
     
-    options.add_argument("--page-load-strategy=eager")
+    options.page_load_strategy = "eager"
+    if "image" in BLOCKED_URL_GROUPS:
+        # The real switch behind the old --disable-images flag (which Chrome ignores)
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    # Network events for per-page traffic reports
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
     
     try:
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+        driver = webdriver.Chrome(service=Service(get_driver_path()), options=options)
         driver.set_page_load_timeout(30)
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": TRACK_REQUESTS_SCRIPT})
+        apply_resource_blocking(driver)
         return driver
     except Exception as e:
         logger.error(f"Failed to setup Chrome driver: {e}")
         raise
 
+def blocked_url_patterns():
+    """URL patterns for the configured extension groups (with and without a query string) and hosts"""
+    patterns = list(BLOCKED_URL_PATTERNS)
+    for group in BLOCKED_URL_GROUPS:
+        for extension in URL_GROUP_EXTENSIONS.get(group, []):
+            patterns += [f"*.{extension}", f"*.{extension}?*"]
+    return patterns
+
+def apply_resource_blocking(driver):
+    """Block the configured URL patterns for every request of this driver"""
+    patterns = blocked_url_patterns()
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    logger.info(f"Blocking {len(patterns)} URL patterns ({', '.join(BLOCKED_URL_GROUPS)})")
+
+def log_page_traffic(driver, label):
+    """Log requests, bytes and blocked requests seen since the last call (reads the performance log)"""
+    try:
+        entries = driver.get_log("performance")
+    except Exception as e:
+        logger.debug(f"Performance log unavailable: {e}")
+        return None
+    
+    types = {}
+    loaded = 0
+    total_bytes = 0
+    blocked = {}
+    for entry in entries:
+        message = json.loads(entry["message"])["message"]
+        method = message.get("method")
+        params = message.get("params", {})
+        if method == "Network.requestWillBeSent":
+            types[params["requestId"]] = params.get("type", "Other")
+        elif method == "Network.loadingFinished":
+            loaded += 1
+            total_bytes += params.get("encodedDataLength", 0)
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            resource_type = types.get(params["requestId"], params.get("type", "Other"))
+            blocked[resource_type] = blocked.get(resource_type, 0) + 1
+    
+    summary = ", ".join(f"{t}: {n}" for t, n in sorted(blocked.items())) or "none"
+    logger.info(f"[{label}] {loaded} requests, {total_bytes / 1024:.1f} KB loaded, {sum(blocked.values())} blocked ({summary})")
+    return {"requests": loaded, "bytes": total_bytes, "blocked": blocked}
+
 def perform_search(driver, search_params):
     """Perform search with specified parameters"""
     try:
@@ -89,21 +252,23 @@ def perform_search(driver, search_params):
         )
         logger.info("Page loaded successfully")
         
-        eopjong_gbcd = search_params.get("eopjong_gbcd", "1")  # 산업기능요원
-        sigungu_cd = search_params.get("sigungu_cd", "1168000000")  # 강남구
+        industry_cd = search_params.get("eopjong_gbcd_list", DEFAULT_INDUSTRY_CD)  # 정보처리
+        sigungu_cd = search_params.get("sigungu_cd", DEFAULT_SIGUNGU_CD)  # 강남구
         
         # Select 산업기능요원 checkbox
         select_industrial_technician(driver)
         
-        # Select 정보처리 industry option
-        select_information_processing(driver)
+        # Select industry option
+        select_industry(driver, industry_cd)
         
-        # Select location (강남구)
+        # Select location
         select_location(driver, sigungu_cd)
         
         click_search_button(driver)
         
-        return wait_for_results(driver)
+        rows = wait_for_results(driver)
+        log_page_traffic(driver, "search")
+        return rows
     
     except Exception as e:
         logger.error(f"Error in search process: {e}")
@@ -118,11 +283,18 @@ def select_industrial_technician(driver):
                 label = checkbox.find_element(By.XPATH, "./following-sibling::label").text
                 if "산업기능요원" in label:
                     logger.info("Found industrial technician checkbox")
-                    driver.execute_script("arguments[0].click();", checkbox)
-                    time.sleep(1)
-                    return
+                    # Clicking an already checked box would uncheck it
+                    if not checkbox.is_selected():
+                        driver.execute_script("arguments[0].click();", checkbox)
+                    break
             except:
                 continue
+        else:
+            checkbox = None
+        
+        if checkbox is not None:
+            wait_until_ready(driver, checkbox)
+            return
         
         logger.info("Trying JavaScript approach for checkbox")
         result = driver.execute_script("""
@@ -131,7 +303,9 @@ def select_industrial_technician(driver):
                 if(label.textContent.includes('산업기능요원')) {
                     const checkbox = label.previousElementSibling;
                     if(checkbox && checkbox.type === 'checkbox') {
-                        checkbox.click();
+                        if(!checkbox.checked) {
+                            checkbox.click();
+                        }
                         return true;
                     }
                 }
@@ -144,11 +318,23 @@ def select_industrial_technician(driver):
         else:
             logger.warning("Failed to select industrial technician checkbox")
         
-        time.sleep(1)
+        wait_until_ready(driver)
     except Exception as e:
         logger.error(f"Error selecting industrial technician checkbox: {e}")
         raise
 
+def select_industry(driver, industry_cd=None):
+    """Select the industry by eopjong_gbcd_list option value, falling back to 정보처리 by name for the default code"""
+    if industry_cd:
+        if driver.execute_script(SELECT_OPTION_BY_VALUE_SCRIPT, industry_cd):
+            logger.info(f"Selected industry {industry_cd}")
+            wait_until_ready(driver)
+            return
+        if industry_cd != DEFAULT_INDUSTRY_CD:
+            # Searching another industry would label the results with a code that was never searched
+            raise ValueError(f"Industry option {industry_cd} not found")
+    select_information_processing(driver)
+
 def select_information_processing(driver):
     """Select the information processing industry"""
     try:
@@ -158,8 +344,8 @@ def select_information_processing(driver):
             for opt in options:
                 if "정보처리" in opt.text:
                     logger.info("Found information processing option")
-                    driver.execute_script("arguments[0].click();", opt)
-                    time.sleep(1)
+                    driver.execute_script(SELECT_OPTION_SCRIPT, opt)
+                    wait_until_ready(driver, opt)
                     return
         
         logger.info("Trying JavaScript approach for information processing")
@@ -184,19 +370,27 @@ def select_information_processing(driver):
         else:
             logger.warning("Failed to select information processing")
         
-        time.sleep(1)
+        wait_until_ready(driver)
     except Exception as e:
         logger.error(f"Error selecting information processing: {e}")
         raise
 
 def select_location(driver, sigungu_cd=None):
-    """Select the location (강남구)"""
+    """Select the location by sigungu_cd option value, falling back to 강남구 by name for the default code"""
     try:
+        if sigungu_cd:
+            if driver.execute_script(SELECT_OPTION_BY_VALUE_SCRIPT, sigungu_cd):
+                logger.info(f"Selected location {sigungu_cd}")
+                wait_until_ready(driver)
+                return
+            if sigungu_cd != DEFAULT_SIGUNGU_CD:
+                raise ValueError(f"Location option {sigungu_cd} not found")
+        
         region_options = driver.find_elements(By.XPATH, "//option[contains(text(), '강남구')]")
         if region_options:
             logger.info("Found Gangnam-gu option")
-            driver.execute_script("arguments[0].click();", region_options[0])
-            time.sleep(1)
+            driver.execute_script(SELECT_OPTION_SCRIPT, region_options[0])
+            wait_until_ready(driver, region_options[0])
             return
         
         logger.info("Trying JavaScript approach for location")
@@ -221,7 +415,7 @@ def select_location(driver, sigungu_cd=None):
         else:
             logger.warning("Failed to select Gangnam-gu")
         
-        time.sleep(1)
+        wait_until_ready(driver)
     except Exception as e:
         logger.error(f"Error selecting location: {e}")
         raise
@@ -277,81 +471,878 @@ def wait_for_results(driver):
         logger.error(f"Error waiting for results: {e}")
         return []
 
-def process_results(rows, output_file="산업기능요원_채용정보.csv"):
-    """Process and save search results"""
+# Reads every row's cell texts and detail link in one WebDriver round trip
+EXTRACT_ROWS_SCRIPT = """
+    return Array.from(arguments[0], row => {
+        const cells = Array.from(row.querySelectorAll('td'));
+        const anchor = cells.length > 1 ? cells[1].querySelector('a') : null;
+        return {
+            cells: cells.map(cell => cell.innerText.trim()),
+            link: anchor ? anchor.href : null
+        };
+    });
+"""
+
+def extract_rows_bulk(rows):
+    """Extract cell texts and links of all rows with a single execute_script call"""
+    if not rows:
+        return []
+    driver = rows[0].parent
+    extracted = driver.execute_script(EXTRACT_ROWS_SCRIPT, rows)
+    if not isinstance(extracted, list) or len(extracted) != len(rows):
+        raise ValueError(f"Bulk extraction returned {len(extracted) if isinstance(extracted, list) else extracted!r} rows for {len(rows)} elements")
+    return extracted
+
+def extract_row(row):
+    """Extract one row element by element (several WebDriver calls per row)"""
+    cells = row.find_elements(By.TAG_NAME, "td")
     try:
-        with open(output_file, "w", newline="", encoding="utf-8-sig") as f:
-            writer = csv.writer(f)
-            writer.writerow(["번호", "업체명", "업종", "소재지", "복무형태", "상세보기 링크"])
+        link = cells[1].find_element(By.TAG_NAME, "a").get_attribute("href") if len(cells) > 1 else None
+    except:
+        link = None
+    return {"cells": [cell.text.strip() for cell in cells], "link": link}
+
+RESULT_HEADER = ["번호", "업체명", "업종", "소재지", "복무형태", "상세보기 링크"]
+
+def snapshot_rows(rows):
+    """Read all rows into plain dicts (one script call, per-element fallback). Failed rows become None"""
+    try:
+        extracted = extract_rows_bulk(rows)
+        logger.info(f"Extracted {len(extracted)} rows with a single script call")
+        return extracted
+    except Exception as e:
+        logger.warning(f"Bulk extraction failed, falling back to per-element extraction: {e}")
+    
+    extracted = []
+    for i, row in enumerate(rows):
+        try:
+            extracted.append(extract_row(row))
+        except Exception as e:
+            logger.error(f"Error processing row {i+1}: {e}")
+            extracted.append(None)
+    return extracted
+
+def snapshot_to_records(snapshot, first_number=1):
+    """Turn a row snapshot into [번호, 업체명, 업종, 소재지, 복무형태, 링크] records"""
+    records = []
+    for i, data in enumerate(snapshot, first_number - 1):
+        if data is None:
+            continue
+        try:
+            cells = data["cells"]
+            if len(cells) < 5:
+                logger.warning(f"Row {i+1} has insufficient cells: {len(cells)}")
+                continue
             
-            for i, row in enumerate(rows):
-                try:
-                    cells = row.find_elements(By.TAG_NAME, "td")
-                    if len(cells) < 5:
-                        logger.warning(f"Row {i+1} has insufficient cells: {len(cells)}")
-                        continue
-                    
-                    company = cells[1].text.strip()
-                    industry = cells[2].text.strip() if len(cells) > 2 else ""
-                    location = cells[3].text.strip() if len(cells) > 3 else ""
-                    service_type = cells[4].text.strip() if len(cells) > 4 else ""
-                    
-                    try:
-                        link = cells[1].find_element(By.TAG_NAME, "a").get_attribute("href")
-                    except:
-                        link = "링크 없음"
-                    
-                    writer.writerow([i+1, company, industry, location, service_type, link])
-                    logger.info(f"Saved: {i+1}. {company}")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing row {i+1}: {e}")
-                    continue
+            company = cells[1]
+            industry = cells[2]
+            location = cells[3]
+            service_type = cells[4]
+            link = data["link"] or "링크 없음"
             
-        logger.info(f"Successfully saved {len(rows)} results to {output_file}")
-        return True
+            records.append([i+1, company, industry, location, service_type, link])
+            
+        except Exception as e:
+            logger.error(f"Error processing row {i+1}: {e}")
+            continue
+    return records
+
+def extract_records(rows):
+    """Turn result rows into [번호, 업체명, 업종, 소재지, 복무형태, 링크] records"""
+    return snapshot_to_records(snapshot_rows(rows))
+
+# Clicks the link to page arguments[0] (or a "next" control) in the pager; returns false on the last page
+NEXT_PAGE_SCRIPT = """
+    const target = String(arguments[0]);
+    const links = Array.from(document.querySelectorAll(
+        '.paging a, .pagination a, .page a, [class*="paging"] a, [class*="pagination"] a'));
+    let next = links.find(a => a.textContent.trim() === target);
+    if(!next) {
+        next = links.find(a => /next|다음/i.test(a.className + ' ' + a.textContent + ' ' + (a.title || '')));
+    }
+    if(!next || next.classList.contains('disabled') || next.getAttribute('aria-disabled') === 'true') {
+        return false;
+    }
+    next.click();
+    return true;
+"""
+
+# Returns the number of the highlighted (current) page in the pager, or null if there is none
+ACTIVE_PAGE_SCRIPT = """
+    const current = document.querySelector(
+        '.paging .on, .paging .active, .paging strong, .pagination .active, .pagination strong, ' +
+        '[class*="paging"] [aria-current="page"], [class*="pagination"] [aria-current="page"]');
+    const number = current ? parseInt(current.textContent.trim(), 10) : NaN;
+    return Number.isNaN(number) ? null : number;
+"""
+
+DEFAULT_MAX_PAGES = 100
+
+def walk_pages(driver, rows, max_pages, pages, stop):
+    """Producer for collect_all_pages: snapshot each page and request the next one right away.
+
+    Puts (page, snapshot) on the pages queue and finally (None, complete). Some pagers keep an
+    enabled "next" link on the last page that reloads it, so the walk also ends (complete) when
+    the highlighted page number does not advance or the new page has the same rows as the last one.
+    """
+    page = 1
+    complete = False
+    previous = None
+    active = driver.execute_script(ACTIVE_PAGE_SCRIPT)
+    try:
+        while rows and not stop.is_set():
+            snapshot = snapshot_rows(rows)
+            if snapshot == previous:
+                logger.info(f"Page {page} has the same rows as page {page - 1}, treating page {page - 1} as the last page")
+                complete = True
+                break
+            pages.put((page, snapshot))
+            previous = snapshot
+            if page > 1:
+                log_page_traffic(driver, f"page {page}")
+            if max_pages is not None and page >= max_pages:
+                logger.warning(f"Stopped after max_pages={max_pages} page(s)")
+                break
+            if stop.is_set() or not driver.execute_script(NEXT_PAGE_SCRIPT, page + 1):
+                # No further page in the pager: every page has been read
+                complete = not stop.is_set()
+                break
+            
+            try:
+                WebDriverWait(driver, 15, poll_frequency=0.05).until(EC.staleness_of(rows[0]))
+                WebDriverWait(driver, 15, poll_frequency=0.05).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "table tbody tr"))
+                )
+            except TimeoutException:
+                logger.warning(f"Page {page + 1} did not load, stopping pagination")
+                break
+            current = driver.execute_script(ACTIVE_PAGE_SCRIPT)
+            if active is not None and current is not None and current <= active:
+                logger.info(f"Pager stayed on page {current}, treating page {page} as the last page")
+                complete = True
+                break
+            active = current
+            rows = driver.find_elements(By.CSS_SELECTOR, "table tbody tr")
+            page += 1
     except Exception as e:
-        logger.error(f"Error processing results: {e}")
-        return False
+        logger.error(f"Pagination failed on page {page}: {e}")
+        complete = False
+    finally:
+        pages.put((None, complete))
+
+def collect_all_pages(driver, rows, max_pages=DEFAULT_MAX_PAGES, sink=None):
+    """Extract the current result page and every following page.
+
+    The browser is driven by a background thread (walk_pages) that reads each page with one bulk
+    snapshot and clicks the pager right away, so the next page loads while this thread converts
+    the previous snapshot and passes it to sink. The sink therefore runs in the caller's thread.
+    Returns (records, complete); complete is False if pagination stopped before the last page
+    (a page failed to load or max_pages was reached).
+    """
+    pages = queue.Queue(maxsize=2)
+    stop = threading.Event()
+    walker = threading.Thread(target=walk_pages, args=(driver, rows, max_pages, pages, stop), daemon=True)
+    walker.start()
+    
+    records = []
+    last_page = 0
+    complete = False
+    try:
+        while True:
+            page, snapshot = pages.get()
+            if page is None:
+                complete = snapshot
+                break
+            page_records = snapshot_to_records(snapshot, len(records) + 1)
+            records.extend(page_records)
+            if sink is not None:
+                sink(page_records)
+            logger.info(f"Page {page}: {len(snapshot)} rows")
+            last_page = page
+    finally:
+        if walker.is_alive():
+            # Stop the walker (e.g. the sink failed) and let it finish before the driver is reused
+            stop.set()
+            while pages.get()[0] is not None:
+                pass
+        walker.join()
+    
+    logger.info(f"Collected {len(records)} results from {last_page} page(s){'' if complete else ' (incomplete)'}")
+    return records, complete
+
+class ListingStore:
+    """SQLite store of the latest listings that records what changed on every run
+
+    Listings are keyed by (search, company, detail link). During a run, records are compared
+    with the previous snapshot of the same search as they arrive: new keys are inserted,
+    changed rows are updated and unchanged rows are not written at all. When a run that covered
+    every result page finishes, keys that were not seen are marked removed. Every change is
+    appended to the changes table, so consumers can read only the deltas of a run.
+    """
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS listings (
+                scope TEXT, company TEXT, link TEXT,
+                industry TEXT, location TEXT, service_type TEXT,
+                row_hash TEXT, first_run INTEGER, changed_run INTEGER, removed_run INTEGER,
+                PRIMARY KEY (scope, company, link)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT, scope TEXT, params TEXT, started TEXT,
+                inserted INTEGER, updated INTEGER, removed INTEGER, unchanged INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS changes (run_id INTEGER, change TEXT, company TEXT, link TEXT);
+            CREATE INDEX IF NOT EXISTS changes_run ON changes (run_id);
+        """)
+        self.run_id = None
+
+    def begin_run(self, search_params):
+        """Start a run for one search and load that search's previous snapshot"""
+        self.scope = search_params_key(search_params)
+        cur = self.conn.execute(
+            "INSERT INTO runs (scope, params, started) VALUES (?, ?, ?)",
+            (self.scope, json.dumps(search_params, ensure_ascii=False, sort_keys=True), datetime.now().isoformat(timespec="seconds"))
+        )
+        self.run_id = cur.lastrowid
+        self.previous = {
+            (company, link): (row_hash, removed_run)
+            for company, link, row_hash, removed_run in self.conn.execute(
+                "SELECT company, link, row_hash, removed_run FROM listings WHERE scope = ?", (self.scope,)
+            )
+        }
+        self.seen = set()
+        self.counts = {"inserted": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        return self.run_id
+
+    def add(self, records):
+        """Compare records ([번호, 업체명, 업종, 소재지, 복무형태, 링크]) with the snapshot and write only changes"""
+        for _, company, industry, location, service_type, link in records:
+            key = (company, link)
+            if key in self.seen:
+                continue
+            self.seen.add(key)
+            row_hash = hashlib.sha1(json.dumps([industry, location, service_type], ensure_ascii=False).encode("utf-8")).hexdigest()
+            
+            old = self.previous.get(key)
+            if old is not None and old[0] == row_hash and old[1] is None:
+                self.counts["unchanged"] += 1
+                continue
+            change = "updated" if old is not None and old[1] is None else "inserted"
+            self.conn.execute("""
+                INSERT INTO listings (scope, company, link, industry, location, service_type, row_hash, first_run, changed_run, removed_run)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)
+                ON CONFLICT (scope, company, link) DO UPDATE SET
+                    industry = excluded.industry, location = excluded.location, service_type = excluded.service_type,
+                    row_hash = excluded.row_hash, changed_run = excluded.changed_run, removed_run = NULL
+            """, (self.scope, company, link, industry, location, service_type, row_hash, self.run_id, self.run_id))
+            self.conn.execute("INSERT INTO changes (run_id, change, company, link) VALUES (?, ?, ?, ?)", (self.run_id, change, company, link))
+            self.counts[change] += 1
+
+    def finish_run(self, complete=True):
+        """Mark listings that were not seen as removed, commit, and return the change counts
+
+        complete must be True only if the run read every result page; otherwise listings on the
+        pages that were not read would be reported as removed (and re-inserted by the next run).
+        """
+        active = [key for key, (_, removed_run) in self.previous.items() if removed_run is None]
+        if not complete and active:
+            logger.warning(f"Run {self.run_id} did not cover every result page; not marking listings as removed")
+            active = []
+        elif not self.seen and active:
+            # An empty result usually means the search failed; keep the snapshot
+            logger.warning(f"Run {self.run_id} returned no listings; not marking {len(active)} listings as removed")
+            active = []
+        for company, link in active:
+            if (company, link) in self.seen:
+                continue
+            self.conn.execute(
+                "UPDATE listings SET removed_run = ? WHERE scope = ? AND company = ? AND link = ?",
+                (self.run_id, self.scope, company, link)
+            )
+            self.conn.execute("INSERT INTO changes (run_id, change, company, link) VALUES (?, 'removed', ?, ?)", (self.run_id, company, link))
+            self.counts["removed"] += 1
+        
+        self.conn.execute(
+            "UPDATE runs SET inserted = ?, updated = ?, removed = ?, unchanged = ? WHERE run_id = ?",
+            (self.counts["inserted"], self.counts["updated"], self.counts["removed"], self.counts["unchanged"], self.run_id)
+        )
+        self.conn.commit()
+        logger.info(
+            f"Run {self.run_id}: {self.counts['inserted']} inserted, {self.counts['updated']} updated, "
+            f"{self.counts['removed']} removed, {self.counts['unchanged']} unchanged"
+        )
+        return dict(self.counts)
+
+    def close(self):
+        self.conn.close()
+
+class ResultCache:
+    """Search results cached on disk per normalized search_params, valid for ttl seconds"""
+    def __init__(self, directory=CACHE_DIR, ttl=CACHE_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, search_params, all_pages):
+        key = search_params_key({**search_params, "all_pages": all_pages})
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, search_params, all_pages=False):
+        """Return cached records, or None if missing, unreadable or older than the TTL"""
+        path = self.path(search_params, all_pages)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            entry = None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            entry = None
+        
+        if entry is not None and not self.valid(entry):
+            logger.warning(f"Ignoring malformed cache entry: {path}")
+            entry = None
+        if entry is not None and time.time() - entry["created"] <= self.ttl:
+            self.hits += 1
+            logger.info(f"Result cache hit ({len(entry['records'])} results, {int(time.time() - entry['created'])}s old): {path}")
+            return entry["records"]
+        self.misses += 1
+        logger.info(f"Result cache miss{' (expired)' if entry is not None else ''}: {path}")
+        return None
+
+    @staticmethod
+    def valid(entry):
+        return (isinstance(entry, dict) and isinstance(entry.get("created"), (int, float))
+                and isinstance(entry.get("records"), list))
+
+    def open_entry(self, search_params, all_pages):
+        """Start an entry that is filled record by record (see CacheEntryWriter)"""
+        return CacheEntryWriter(self.path(search_params, all_pages), search_params)
+
+    def put(self, search_params, all_pages, records):
+        """Write the entry to a temporary file and rename it, so readers never see a partial file"""
+        entry = self.open_entry(search_params, all_pages)
+        try:
+            entry.add(records)
+        except BaseException:
+            entry.discard()
+            raise
+        entry.commit()
+
+    def prune(self):
+        """Delete entries older than the TTL and leftover temporary files (by modification time)"""
+        removed = 0
+        now = time.time()
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl and name.endswith((".json", ".tmp")):
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            logger.info(f"Pruned {removed} expired cache file(s) from {self.directory}")
+        return removed
+
+    def log_stats(self):
+        logger.info(f"Result cache: {self.hits} hit(s), {self.misses} miss(es)")
+
+class CacheEntryWriter:
+    """A result cache entry written to a temporary file as records arrive
+
+    commit() renames the file into place, so readers never see a partial entry; discard() drops it.
+    """
+    def __init__(self, path, search_params):
+        self.path = path
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        self.file = os.fdopen(fd, "w", encoding="utf-8")
+        self.file.write(f'{{"created": {json.dumps(time.time())}, "params": {json.dumps(search_params, ensure_ascii=False)}, "records": [')
+        self.count = 0
+
+    def add(self, records):
+        for record in records:
+            self.file.write(("," if self.count else "") + json.dumps(record, ensure_ascii=False))
+            self.count += 1
+
+    def commit(self):
+        try:
+            self.file.write("]}")
+            self.file.close()
+            os.replace(self.tmp_path, self.path)
+        except BaseException:
+            self.discard()
+            raise
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+class CsvRecordWriter:
+    """Writes records to the output CSV as they arrive (the file is created on the first write)"""
+    def __init__(self, output_file="산업기능요원_채용정보.csv"):
+        self.output_file = output_file
+        self.file = None
+        self.writer = None
+        self.count = 0
+
+    def add(self, records):
+        if self.file is None:
+            self.file = open(self.output_file, "w", newline="", encoding="utf-8-sig")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(RESULT_HEADER)
+        self.writer.writerows(records)
+        self.file.flush()
+        self.count += len(records)
+
+    def finish(self):
+        """Close the file (writing just the header if nothing arrived) and return the record count"""
+        if self.file is None:
+            self.add([])
+        self.close()
+        logger.info(f"Successfully saved {self.count} results to {self.output_file}")
+        return self.count
+
+    def close(self):
+        if self.file is not None and not self.file.closed:
+            self.file.close()
+
+class DriverPool:
+    """A fixed set of long-lived Chrome drivers shared by batch searches
+
+    Drivers are started once (in parallel) and reused; between searches only cookies and
+    storage are cleared. A driver that fails with a WebDriverException is replaced. If the
+    replacement cannot be started, an empty slot (None) is queued instead and the next job
+    that takes it tries to start a browser again, so the pool never shrinks.
+    """
+    acquire_timeout = 300
+
+    def __init__(self, size):
+        self.idle = queue.Queue()
+        try:
+            with ThreadPoolExecutor(max_workers=size) as executor:
+                for driver in executor.map(lambda _: setup_driver(), range(size)):
+                    self.idle.put(driver)
+        except Exception:
+            self.close()
+            raise
+        logger.info(f"Started {size} browser(s)")
+
+    def run(self, job, *args):
+        """Run job(driver, *args) on an idle driver and return its result"""
+        try:
+            driver = self.idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No browser became available within {self.acquire_timeout}s")
+        if driver is None:
+            try:
+                driver = setup_driver()
+            except Exception:
+                self.idle.put(None)
+                raise
+        
+        try:
+            result = job(driver, *args)
+        except WebDriverException:
+            self._replace(driver)
+            raise
+        except Exception:
+            self._release(driver)
+            raise
+        self._release(driver)
+        return result
+
+    def _release(self, driver):
+        try:
+            reset_page(driver)
+            self.idle.put(driver)
+        except WebDriverException:
+            self._replace(driver)
+
+    def _replace(self, driver):
+        logger.warning("Replacing a failed browser")
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        try:
+            self.idle.put(setup_driver())
+        except Exception as e:
+            logger.error(f"Could not start a replacement browser, retrying on next use: {e}")
+            self.idle.put(None)
+
+    def close(self):
+        while not self.idle.empty():
+            driver = self.idle.get()
+            if driver is not None:
+                driver.quit()
+        logger.info("WebDrivers closed")
+
+def reset_page(driver):
+    """Clear per-search state so the next search starts clean without relaunching Chrome"""
+    driver.delete_all_cookies()
+    driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+    driver.get("about:blank")
+
+def search_and_extract(driver, search_params, all_pages=False, max_pages=DEFAULT_MAX_PAGES):
+    """One browser search returning (records, complete) (rows must be read before the driver is reused)
+
+    Without all_pages only the first page is read, so the result is never complete.
+    """
+    rows = perform_search(driver, search_params)
+    if not rows:
+        return [], False
+    if all_pages:
+        return collect_all_pages(driver, rows, max_pages)
+    return extract_records(rows), False
+
+def run_batch(param_sets, pool_size=2, output_file="산업기능요원_채용정보.csv", all_pages=False, store_path=None,
+              cache=None, refresh=False, max_pages=DEFAULT_MAX_PAGES):
+    """Run every parameter set over a pool of browsers and merge the results into one CSV (or the listing store)
+
+    Parameter sets found in the result cache are not searched again; the browser pool is only
+    started for the misses. With all_pages, only complete results are cached, so a cached
+    all-pages result is complete as well.
+    """
+    base_params = extract_search_params_from_xml(XML_PAYLOAD)
+    jobs = [{**base_params, **params} for params in param_sets]
+    started = time.perf_counter()
+    
+    results = [None] * len(jobs)
+    misses = []
+    for i, params in enumerate(jobs):
+        records = cache.get(params, all_pages) if cache is not None and not refresh else None
+        if records is None:
+            misses.append(i)
+        results[i] = (params, records, all_pages)
+    
+    if misses:
+        pool = DriverPool(min(pool_size, len(misses)))
+        try:
+            with ThreadPoolExecutor(max_workers=pool_size) as executor:
+                futures = [executor.submit(pool.run, search_and_extract, jobs[i], all_pages, max_pages) for i in misses]
+                for i, future in zip(misses, futures):
+                    params = jobs[i]
+                    try:
+                        records, complete = future.result()
+                        results[i] = (params, records, complete)
+                        if cache is not None and records and (complete or not all_pages):
+                            cache.put(params, all_pages, records)
+                    except Exception as e:
+                        logger.error(f"Search failed for {params.get('sigungu_cd')}: {e}")
+        finally:
+            pool.close()
+    if cache is not None:
+        cache.log_stats()
+    
+    if store_path:
+        store = ListingStore(store_path)
+        try:
+            for params, records, complete in results:
+                if records is None:
+                    continue
+                store.begin_run(params)
+                store.add(records)
+                store.finish_run(complete)
+        finally:
+            store.close()
+        total = sum(len(records or []) for _, records, _ in results)
+        logger.info(f"✅ Batch completed: {len(jobs)} searches, {total} results in {time.perf_counter() - started:.1f}s saved to {store_path}")
+        return total
+    
+    total = 0
+    with open(output_file, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(RESULT_HEADER + ["시군구코드", "업종코드"])
+        for params, records, _ in results:
+            records = records or []
+            for record in records:
+                writer.writerow(record + [params.get("sigungu_cd", ""), params.get("eopjong_gbcd_list", "")])
+            total += len(records)
+    
+    logger.info(f"✅ Batch completed: {len(jobs)} searches, {total} results in {time.perf_counter() - started:.1f}s saved to {output_file}")
+    return total
+
+def local_name(tag):
+    """Strip the XML namespace from an element tag"""
+    return tag.rsplit("}", 1)[-1]
+
+def find_input_dataset(root):
+    """Return the inputVO dataset element of a nexacro request"""
+    for dataset in root.iter(f"{{{NEXACRO_NS}}}Dataset"):
+        if dataset.get("id") == "inputVO":
+            return dataset
+    raise ValueError("inputVO dataset not found in XML payload")
 
 def extract_search_params_from_xml(xml_payload):
     """Extract search parameters from XML payload"""
     try:
-        return {
-            "eopjong_gbcd": "1",         
-            "eopjong_gbcd_list": "11111",
-            "gegyumo_cd": "02",           
-            "eopche_nm": "",              
-            "juso_cd": "1100000000",      
-            "sido_cd": "1100000000",      
-            "sigungu_cd": "1168000000",   
-        }
+        root = ET.fromstring(xml_payload.encode("utf-8"))
+        row = find_input_dataset(root).find(f"{{{NEXACRO_NS}}}Rows/{{{NEXACRO_NS}}}Row")
+        if row is None:
+            return {}
+        return {col.get("id"): col.text or "" for col in row}
     except Exception as e:
         logger.error(f"Error extracting search parameters from XML: {e}")
         return {}
 
+def search_params_key(search_params):
+    """Stable key for a parameter set (same parameters in any order give the same key)"""
+    normalized = json.dumps({k: str(v) for k, v in search_params.items()}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+def build_xml_payload(search_params, template=XML_PAYLOAD, sso_token=None):
+    """Build a nexacro dataset request from search_params, keeping the template's Parameters"""
+    ET.register_namespace("", NEXACRO_NS)
+    root = ET.fromstring(template.encode("utf-8"))
+    if sso_token is not None:
+        for parameter in root.iter(f"{{{NEXACRO_NS}}}Parameter"):
+            if parameter.get("id") == "ssotoken":
+                parameter.text = sso_token
+    dataset = find_input_dataset(root)
+    columns = [col.get("id") for col in dataset.iter(f"{{{NEXACRO_NS}}}Column")]
+    
+    unknown = set(search_params) - set(columns)
+    if unknown:
+        logger.warning(f"Ignoring parameters not in inputVO: {sorted(unknown)}")
+    
+    row = dataset.find(f"{{{NEXACRO_NS}}}Rows/{{{NEXACRO_NS}}}Row")
+    row.clear()
+    for column in columns:
+        if column in search_params:
+            col = ET.SubElement(row, f"{{{NEXACRO_NS}}}Col", id=column)
+            col.text = str(search_params[column]) or None
+    return ET.tostring(root, encoding="utf-8", xml_declaration=True)
+
+class TeeReader:
+    """File-like wrapper that copies everything read from source into a file"""
+    def __init__(self, source, copy):
+        self.source = source
+        self.copy = copy
+
+    def read(self, size=-1):
+        data = self.source.read(size)
+        self.copy.write(data)
+        return data
+
+def iter_dataset_rows(source):
+    """Parse a nexacro dataset response incrementally and yield each Row of the first dataset as a dict.
+
+    Parsed rows are removed from the tree right away, so the XML tree never holds more than one row.
+    """
+    params = {}
+    columns = None
+    rows_parent = None
+    dataset_id = None
+    
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        tag = local_name(elem.tag)
+        if event == "start":
+            if tag == "Dataset" and dataset_id is None:
+                dataset_id = elem.get("id")
+            elif tag == "Rows" and dataset_id is not None:
+                rows_parent = elem
+            continue
+        
+        if tag == "Parameter":
+            params[elem.get("id")] = elem.text or ""
+            code = (elem.text or "0").strip()
+            if elem.get("id") == "ErrorCode" and code.lstrip("-").isdigit() and int(code) < 0:
+                raise RuntimeError(f"Backend error {code}: {params.get('ErrorMsg', '')}")
+        elif tag == "ColumnInfo" and columns is None:
+            columns = [col.get("id") for col in elem]
+            missing = [column for column in DATASET_RESULT_COLUMNS if column not in columns]
+            if missing:
+                logger.warning(f"Dataset has no {missing} columns (got {columns}); those fields will be empty")
+            elem.clear()
+        elif tag == "Row" and columns is not None and rows_parent is not None:
+            yield {col.get("id"): col.text or "" for col in elem}
+            rows_parent.remove(elem)
+        elif tag == "Dataset" and elem.get("id") == dataset_id:
+            # Only the first dataset holds the listing
+            break
+    
+    if params.get("ErrorMsg"):
+        logger.info(f"Backend message: {params['ErrorMsg']}")
+
+def dataset_to_records(rows):
+    """Map dataset rows to [번호, 업체명, 업종, 소재지, 복무형태, 링크] records one by one (same layout as the browser path)"""
+    for number, row in enumerate(rows, 1):
+        company, industry, location, service_type, link = (row.get(column, "") for column in DATASET_RESULT_COLUMNS)
+        yield [number, company, industry, location, service_type, link or "링크 없음"]
+
+def search_direct(search_params, sink, backend_url=None, sso_token=None, record_dir=None):
+    """Send the dataset request straight to the backend (no browser) and stream the listing records.
+
+    Each record is passed to sink as a one-record list as soon as its row is parsed, so the
+    CSV writer, listing store and result cache are fed while the response is still arriving.
+    The records have the same layout as the browser path. If record_dir is given, the raw
+    response is also saved as <record_dir>/<params key>.xml so mma_standin.py can replay it later.
+    Returns the number of records.
+    """
+    backend_url = backend_url or BACKEND_URL
+    sso_token = sso_token or SSO_TOKEN
+    if not backend_url:
+        raise ValueError("--direct needs the dataset endpoint: set MMA_BACKEND_URL or pass --backend-url "
+                         "(the URL the search page POSTs to, from the browser's network tab)")
+    if not sso_token:
+        raise ValueError("--direct needs a current session token: set MMA_SSO_TOKEN or pass --sso-token "
+                         "(the ssotoken parameter of the search request, from the browser's network tab)")
+    payload = build_xml_payload(search_params, sso_token=sso_token)
+    started = time.perf_counter()
+    
+    def stream(source):
+        count = 0
+        for record in dataset_to_records(iter_dataset_rows(source)):
+            sink([record])
+            count += 1
+        return count
+    
+    with requests.post(
+        backend_url,
+        data=payload,
+        headers={"Content-Type": "text/xml; charset=UTF-8", "Accept": "application/xml, text/xml, */*"},
+        timeout=30,
+        stream=True
+    ) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        if record_dir:
+            os.makedirs(record_dir, exist_ok=True)
+            record_path = os.path.join(record_dir, f"{search_params_key(search_params)}.xml")
+            with open(record_path, "wb") as record:
+                count = stream(TeeReader(response.raw, record))
+                # Keep the rest of the response so the recording is complete
+                for chunk in iter(lambda: response.raw.read(64 * 1024), b""):
+                    record.write(chunk)
+            logger.info(f"Recorded response to {record_path}")
+        else:
+            count = stream(response.raw)
+    
+    logger.info(f"Direct search returned {count} rows in {time.perf_counter() - started:.2f}s")
+    return count
+
 def main():
+    parser = argparse.ArgumentParser(description="MMA industrial technician job listing scraper")
+    parser.add_argument("--direct", action="store_true", help="send the dataset request directly instead of driving Chrome")
+    parser.add_argument("--backend-url", default=None, help="dataset endpoint for --direct (default: $MMA_BACKEND_URL, required)")
+    parser.add_argument("--sso-token", default=None, help="session ssotoken for --direct (default: $MMA_SSO_TOKEN, required)")
+    parser.add_argument("--record-dir", default=None, help="save raw --direct responses here for mma_standin.py")
+    parser.add_argument("--output", default="산업기능요원_채용정보.csv", help="output CSV file")
+    parser.add_argument("--batch", default=None, help="JSON file with a list of parameter sets (e.g. [{\"sigungu_cd\": \"1165000000\"}])")
+    parser.add_argument("--pool-size", type=int, default=2, help="number of browsers for --batch")
+    parser.add_argument("--all-pages", action="store_true", help="follow the pager and collect every result page")
+    parser.add_argument("--max-pages", type=int, default=DEFAULT_MAX_PAGES,
+                        help=f"stop --all-pages after this many pages (default: {DEFAULT_MAX_PAGES}, 0 for no limit)")
+    parser.add_argument("--store", default=None, help="SQLite file that keeps listings and per-run changes (instead of the CSV)")
+    parser.add_argument("--cache-ttl", type=int, default=CACHE_TTL, help=f"seconds cached results stay valid (default: {CACHE_TTL})")
+    parser.add_argument("--refresh", action="store_true", help="ignore cached results and search again")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the result cache")
+    args = parser.parse_args()
+    
+    search_params = extract_search_params_from_xml(XML_PAYLOAD)
+    max_pages = args.max_pages or None
+    cache = None if args.no_cache else ResultCache(CACHE_DIR, args.cache_ttl)
+    if cache is not None:
+        cache.prune()
+    
+    if args.batch:
+        try:
+            with open(args.batch, "r", encoding="utf-8") as f:
+                param_sets = json.load(f)
+            run_batch(param_sets, args.pool_size, args.output, args.all_pages, args.store, cache, args.refresh, max_pages)
+        except Exception as e:
+            logger.error(f"❌ Batch process error: {e}")
+        return
+    
+    # A direct search returns the whole dataset, the same results as following every page
+    all_pages = args.all_pages or args.direct
+    
+    store = ListingStore(args.store) if args.store else None
+    # Without a store, records are appended to the CSV as they arrive
+    output = None if store else CsvRecordWriter(args.output)
+    sink = store.add if store else output.add
     driver = None
     try:
-        driver = setup_driver()
-        search_params = extract_search_params_from_xml(XML_PAYLOAD)
-        rows = perform_search(driver, search_params)
-        
-        if not rows:
-            logger.error("No results found or error occurred during search")
-            return
-        
-        success = process_results(rows)
+        records = cache.get(search_params, all_pages) if cache is not None and not args.refresh else None
+        # Only complete results are cached for all_pages, and a direct search returns every listing
+        complete = all_pages
+        if records is not None:
+            # Cache hit: no browser needed
+            if store:
+                store.begin_run(search_params)
+            sink(records)
+            total = len(records)
+        elif args.direct:
+            if store:
+                store.begin_run(search_params)
+            # The cache entry is filled from the same stream and only kept if the search succeeded
+            entry = cache.open_entry(search_params, all_pages) if cache is not None else None
+            
+            def direct_sink(records):
+                sink(records)
+                if entry is not None:
+                    entry.add(records)
+            
+            try:
+                total = search_direct(search_params, direct_sink, args.backend_url, args.sso_token, args.record_dir)
+            except BaseException:
+                if entry is not None:
+                    entry.discard()
+                raise
+            if entry is not None:
+                if total:
+                    entry.commit()
+                else:
+                    entry.discard()
+        else:
+            driver = setup_driver()
+            rows = perform_search(driver, search_params)
+            
+            if not rows:
+                logger.error("No results found or error occurred during search")
+                return
+            
+            if store:
+                store.begin_run(search_params)
+            if args.all_pages:
+                records, complete = collect_all_pages(driver, rows, max_pages, sink=sink)
+            else:
+                records, complete = extract_records(rows), False
+                sink(records)
+            total = len(records)
+            if cache is not None and records and (complete or not args.all_pages):
+                cache.put(search_params, args.all_pages, records)
         
-        if success:
-            logger.info(f"✅ Crawling completed! Total {len(rows)} results saved to CSV file.")
+        if store:
+            counts = store.finish_run(complete)
+            logger.info(f"✅ Crawling completed! Changes saved to {args.store}: {counts}")
         else:
-            logger.error("Failed to process results")
+            output.finish()
+            logger.info(f"✅ Crawling completed! Total {total} results saved to CSV file.")
             
     except Exception as e:
         logger.error(f"❌ Overall process error: {e}")
         
     finally:
+        if store:
+            store.close()
+        if output is not None:
+            output.close()
+        if cache is not None:
+            cache.log_stats()
         if driver:
             driver.quit()
             logger.info("WebDriver closed")